@@ -1,6 +1,8 @@
 import streamlit as st
-from utils import api_post, api_get, require_access_or_redirect
+from utils import api_post, api_get, stream_tokens, require_access_or_redirect
 from datetime import datetime, timezone
+import time
+import uuid
 
 redirect_page = st.query_params.get("page")
 
@@ -46,6 +48,10 @@ if "chat_history" not in st.session_state:
 if "agent_chat_history" not in st.session_state:
     st.session_state.agent_chat_history = []
 
+# The API keeps the agent's memory per conversation id
+if "agent_conversation_id" not in st.session_state:
+    st.session_state.agent_conversation_id = uuid.uuid4().hex
+
 if "active_document_id" not in st.session_state:
     st.session_state.active_document_id = None
 
@@ -57,6 +63,8 @@ if st.session_state.token:
     if st.sidebar.button("Logout"):
         st.session_state.token = None
         st.session_state.chat_history = []
+        st.session_state.agent_chat_history = []
+        st.session_state.agent_conversation_id = uuid.uuid4().hex
 else:
     st.sidebar.warning("Not Logged In")
 
@@ -217,8 +225,31 @@ elif page == "Upload Document":
             files = {"file": (file.name, file.getvalue())}
             res = api_post("/documents/upload", files=files, token=st.session_state.token)
             if res:
-                st.success("Uploaded successfully!")
-                st.session_state.active_document_id = res.get("document_id")
+                st.info("Upload received. Processing document...")
+                progress = st.progress(0.0)
+                job = {"status": "queued"}
+
+                # Poll the ingestion job until the worker finishes
+                while job and job.get("status") not in ["completed", "duplicate", "failed"]:
+                    time.sleep(1)
+                    job = api_get(f"/documents/jobs/{res['job_id']}", token=st.session_state.token)
+                    if job and job.get("total_pages"):
+                        progress.progress(
+                            min(job["pages_processed"] / job["total_pages"], 1.0),
+                            text=f"{job['status'].capitalize()}..."
+                        )
+
+                if not job:
+                    st.error("Unable to load upload status.")
+                elif job["status"] == "completed":
+                    progress.progress(1.0)
+                    st.success("Uploaded successfully!")
+                    st.session_state.active_document_id = job.get("document_id")
+                elif job["status"] == "duplicate":
+                    st.warning("Document already uploaded")
+                    st.session_state.active_document_id = job.get("document_id")
+                else:
+                    st.error(f"Processing failed: {job.get('error')}")
 
 # ------------------- RAG CHAT PAGE ------------------
 elif page == "RAG Chat":
@@ -240,12 +271,16 @@ elif page == "RAG Chat":
         st.session_state.chat_history.append({"role": "user", "text": question})
         st.chat_message("user").write(question)
 
-        res = api_post("/rag/ask", json={"question": question}, token=st.session_state.token)
+        # Render the answer incrementally as tokens arrive
+        with st.chat_message("assistant"):
+            answer = st.write_stream(stream_tokens(
+                "/rag/ask",
+                json={"question": question, "stream": True},
+                token=st.session_state.token
+            ))
 
-        if res:
-            answer = res.get("answer", "No answer returned")
+        if answer:
             st.session_state.chat_history.append({"role": "assistant", "text": answer})
-            st.chat_message("assistant").write(answer)
 
 # ------------------- AGENT CHAT PAGE ----------------
 elif page == "AI Agent":
@@ -272,20 +307,21 @@ elif page == "AI Agent":
         })
         st.chat_message("user").write(agent_question)
 
-        # Call agent API
-        res = api_post(
-            "/agent/ask",
-            json={
-                "query": agent_question,
-                "document_id": st.session_state.active_document_id
-            },
-            token=st.session_state.token
-        )
+        # Call agent API and render the reply as it streams in
+        with st.chat_message("assistant"):
+            answer = st.write_stream(stream_tokens(
+                "/agent/ask",
+                json={
+                    "query": agent_question,
+                    "document_id": st.session_state.active_document_id,
+                    "conversation_id": st.session_state.agent_conversation_id,
+                    "stream": True
+                },
+                token=st.session_state.token
+            ))
 
-        if res:
-            answer = res.get("response", "No response")
+        if answer:
             st.session_state.agent_chat_history.append({
                 "role": "assistant",
                 "text": answer
-            })
-            st.chat_message("assistant").write(answer)
\ No newline at end of file
+            })
\ No newline at end of file
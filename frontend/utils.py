@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+import json as _json
 
 API_BASE = "https://documentassistant-production.up.railway.app"
 
@@ -23,6 +24,42 @@ def api_post(path, json=None, files=None, token=None):
         return None
 
 
+def api_stream(path, json=None, token=None):
+    """
+    POST to a Server-Sent-Events endpoint and yield (event, data) pairs.
+    """
+    headers = {"Accept": "text/event-stream"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    try:
+        with requests.post(API_BASE + path, json=json, headers=headers, stream=True) as res:
+            if res.status_code >= 400:
+                st.error(res.text)
+                return
+
+            event = "message"
+            for line in res.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, _json.loads(line[len("data:"):].strip())
+                    event = "message"
+    except Exception as e:
+        st.error(f"Request failed: {e}")
+
+
+def stream_tokens(path, json=None, token=None):
+    """
+    Yield only the answer text from a streaming endpoint, for st.write_stream.
+    """
+    for event, data in api_stream(path, json=json, token=token):
+        if event == "token":
+            yield data.get("text", "")
+        elif event == "error":
+            st.error(data.get("detail", "Streaming failed"))
+
+
 def api_get(path, token=None):
     headers = {}
     if token:
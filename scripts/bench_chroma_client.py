@@ -0,0 +1,82 @@
+"""
+Chroma query latency with a client built per call (the old
+get_or_create_collection) versus the shared client and cached handle.
+
+"per-call client" matches the old code: chromadb keeps a per-path system
+cache, so a new PersistentClient reuses the opened store. "per-call cold"
+also clears that cache, i.e. the store is reopened from disk every time.
+
+    python scripts/bench_chroma_client.py --chunks 100000
+"""
+import argparse
+import shutil
+import time
+from bench_stubs import ROOT, bench_env, fake_vector, seed_chunks, summarize_latencies
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--cold-queries", type=int, default=5)
+    parser.add_argument("--reuse", action="store_true", help="keep the store seeded by a previous run")
+    return parser.parse_args()
+
+def main(args):
+    path = ROOT / "cache" / "bench_chroma"
+    if not args.reuse:
+        shutil.rmtree(path, ignore_errors=True)
+    bench_env()
+
+    import chromadb
+    from src.utils import vector_store
+
+    if not args.reuse:
+        started = time.perf_counter()
+        seed_chunks(user_id=1, document_id=1, count=args.chunks, lexical=False)
+        print(f"seeded {args.chunks} chunks in {time.perf_counter() - started:.0f}s")
+
+    vectors = [fake_vector(f"query {i}") for i in range(args.queries)]
+
+    def query(collection, vector, where):
+        return collection.query(
+            query_embeddings=[vector],
+            n_results=5,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+
+    def per_call(vector, where):
+        client = chromadb.PersistentClient(path=str(path))
+        collection = client.get_or_create_collection(
+            name=vector_store.DEFAULT_COLLECTION,
+            metadata={"hnsw:space": "cosine"}
+        )
+        return query(collection, vector, where)
+
+    def per_call_cold(vector, where):
+        client = chromadb.PersistentClient(path=str(path))
+        client.clear_system_cache()
+        return per_call(vector, where)
+
+    def pooled(vector, where):
+        return query(vector_store.get_user_collection(1), vector, where)
+
+    # Warm the HNSW index once so every variant starts from the same state
+    pooled(vectors[0], None)
+
+    # The user_id filter is what metadata partitioning sends; None is the tenant case
+    for label, where in (("user_id filter", vector_store.scope_filter(1)), ("no filter", None)):
+        for name, fn, count in (
+            ("pooled handle", pooled, args.queries),
+            ("per-call client", per_call, args.queries),
+            ("per-call cold", per_call_cold, args.cold_queries)
+        ):
+            latencies = []
+            for vector in vectors[:count]:
+                started = time.perf_counter()
+                fn(vector, where)
+                latencies.append(time.perf_counter() - started)
+            print(summarize_latencies(f"{label}, {name}", latencies), flush=True)
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,116 @@
+"""
+Embedding calls and wall time to chunk and embed one large document.
+
+"two-pass" is the old pipeline: SemanticChunker embeds every sentence
+window to find breakpoints, then every resulting chunk is embedded again.
+The other rows are chunk_and_embed, which pools the sentence-window
+vectors (semantic) or embeds recursive chunks once (recursive).
+
+Embeddings go through CachedEmbeddings and BatchedEmbeddings over a
+stub, as in the app, so "requests" is the number of batched API calls
+Gemini would see. Each cold run starts with an empty embedding cache and
+chunk-embedding store; "stored" is the number of chunk-embedding rows
+the run wrote. The re-upload row ingests the same text again on warm
+caches and reports chunk and sentence-window hits separately.
+
+    python scripts/bench_chunking.py --pages 200
+"""
+import argparse
+import random
+import time
+from bench_stubs import ROOT, bench_env, StubEmbeddings, WORDS, fake_text
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--sentences-per-page", type=int, default=25)
+    return parser.parse_args()
+
+def synthetic_document(pages: int, sentences_per_page: int) -> str:
+    # Topic shifts every few paragraphs give the semantic splitter real breakpoints
+    rng = random.Random(7)
+    paragraphs = []
+    for page in range(pages):
+        sentences = []
+        for i in range(sentences_per_page):
+            topic = rng.choice(WORDS)
+            sentences.append(f"{topic.capitalize()} {fake_text(page * 1000 + i, words=rng.randint(8, 20))}.")
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+def main(args):
+    (ROOT / "cache" / "bench_chunking.sqlite").unlink(missing_ok=True)
+    bench_env(
+        DATABASE_URL=f"sqlite:///{ROOT / 'cache' / 'bench_chunking.sqlite'}",
+        EMBED_REQUESTS_PER_MINUTE=1_000_000
+    )
+
+    from langchain_experimental.text_splitter import SemanticChunker
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from src.core.database import Base, SessionLocal, engine
+    from src.models.chunk_embeddings import ChunkEmbedding
+    from src.services.document_service import chunk_and_embed, embed_chunks
+    from src.utils.models import models, BatchedEmbeddings
+    from src.utils.embedding_cache import CachedEmbeddings
+
+    Base.metadata.create_all(bind=engine, tables=[ChunkEmbedding.__table__])
+    stub = StubEmbeddings(latency=0.1, per_text=0.002)
+
+    text = synthetic_document(args.pages, args.sentences_per_page)
+
+    def two_pass(db):
+        # The pre-change chunk_text followed by embed_chunks
+        recursive_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=512,
+            chunk_overlap=100,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+        chunks = []
+        for chunk in SemanticChunker(models.embeddings).split_text(text):
+            if len(chunk) > 512:
+                chunks.extend(recursive_splitter.split_text(chunk))
+            else:
+                chunks.append(chunk)
+        embed_chunks(chunks, db)
+        return chunks
+
+    def single_pass(mode):
+        def run(db):
+            chunks, _, cache = chunk_and_embed(text, db, mode=mode)
+            return chunks, cache
+        return run
+
+    def ratio(hits, lookups):
+        return f"{hits / lookups:.2f}" if lookups else "-"
+
+    print(f"{args.pages} pages, {len(text):,} characters")
+    for name, run, warm in (
+        ("two-pass (old)", two_pass, False),
+        ("semantic, pooled", single_pass("semantic"), False),
+        ("semantic, re-upload", single_pass("semantic"), True),
+        ("recursive", single_pass("recursive"), False)
+    ):
+        with SessionLocal() as db:
+            if not warm:
+                db.query(ChunkEmbedding).delete()
+                db.commit()
+                models._embeddings = CachedEmbeddings(BatchedEmbeddings(stub), model_name="bench")
+            rows_before = db.query(ChunkEmbedding).count()
+
+            stub.calls = stub.texts = 0
+            started = time.perf_counter()
+            result = run(db)
+            elapsed = time.perf_counter() - started
+            stored = db.query(ChunkEmbedding).count() - rows_before
+
+        chunks, cache = result if isinstance(result, tuple) else (result, {})
+        print(
+            f"{name:<20} chunks={len(chunks):<6} embedded texts={stub.texts:<6} "
+            f"requests={stub.calls:<4} stored={stored:<6} "
+            f"chunk hits={ratio(cache.get('hits', 0), cache.get('lookups', 0)):<5} "
+            f"window hits={ratio(cache.get('window_hits', 0), cache.get('window_lookups', 0)):<5} "
+            f"wall={elapsed:.1f}s"
+        )
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,100 @@
+"""
+Text normalization on a multi-MB synthetic document.
+
+"per-abbreviation (old)" is the pre-change preprocess_text: patterns
+compiled on every call and one re.sub scan per abbreviation. The other
+rows are TextNormalizer.normalize on the whole string and
+normalize_pages page by page, as PDF extraction calls it.
+
+Pages mix abbreviations, "Page n of m" markers, bullets and null bytes.
+--compat adds NFKC compatibility characters (ligatures, full-width
+digits), so normalize cannot skip the NFKC pass. normalize_pages strips
+each page, so only whitespace at page boundaries may differ from the
+whole-string output ("same words").
+
+    python scripts/bench_normalizer.py --pages 2000 --repeat 5
+"""
+import argparse
+import random
+import re
+import statistics
+import time
+import unicodedata
+from bench_stubs import fake_text
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compat", action="store_true")
+    return parser.parse_args()
+
+def legacy_preprocess_text(text: str) -> str:
+    # Pre-change implementation, kept verbatim as the baseline
+    text = text.replace("\x00", "")
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(r"Page\s*\d+\s*(of\s*\d+)?", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"[•·●■□▪▶➤►]", "-", text)
+
+    abbreviation_map = {
+        r"\bROM\b": "Range of Motion",
+        r"\bADL\b": "Activities of Daily Living",
+        r"\bWNL\b": "Within Normal Limits",
+        r"\bPT\b": "Physiotherapy",
+        r"\bOT\b": "Occupational Therapy"
+    }
+    for abbr, full in abbreviation_map.items():
+        text = re.sub(abbr, full, text)
+
+    text = re.sub(r"\n{2,}", "\n\n", text)
+    text = re.sub(r"[ ]{2,}", " ", text)
+    return text.strip()
+
+def synthetic_pages(pages: int, compat: bool) -> list[str]:
+    rng = random.Random(11)
+    extras = ["ROM", "ADL", "WNL", "PT", "OT", "•", "●", "  ", "\x00"]
+    if compat:
+        extras += ["ﬁ", "１２", "ﬂ"]
+
+    result = []
+    for n in range(pages):
+        words = fake_text(n, words=450).split()
+        for _ in range(40):
+            words.insert(rng.randrange(len(words)), rng.choice(extras))
+        lines = [" ".join(words[i:i + 15]) for i in range(0, len(words), 15)]
+        result.append(f"Page {n + 1} of {pages}\n" + "\n".join(lines) + "\n\n\n")
+    return result
+
+def timed(run, repeat: int) -> tuple[float, object]:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = run()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), output
+
+def main(args):
+    from src.utils.text_normalizer import default_normalizer
+
+    pages = synthetic_pages(args.pages, args.compat)
+    text = "\n\n".join(pages)
+    print(f"{args.pages} pages, {len(text.encode('utf-8')) / 1e6:.1f} MB, compat={args.compat}")
+
+    baseline = None
+    for name, run in (
+        ("per-abbreviation (old)", lambda: legacy_preprocess_text(text)),
+        ("normalize", lambda: default_normalizer.normalize(text)),
+        ("normalize_pages", lambda: "\n\n".join(default_normalizer.normalize_pages(pages)))
+    ):
+        elapsed, output = timed(run, args.repeat)
+        if baseline is None:
+            baseline = (elapsed, output)
+        print(
+            f"{name:<24} median={elapsed * 1000:8.1f} ms  "
+            f"speedup={baseline[0] / elapsed:5.2f}x  "
+            f"identical={output == baseline[1]}  "
+            f"same words={output.split() == baseline[1].split()}"
+        )
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,102 @@
+"""
+OCR stage on a fully scanned PDF: per-page render + serial OCR (the old
+pipeline) versus ocr_pages, which opens the PDF once, renders pages in
+memory and OCRs them on the worker pool.
+
+The old pipeline ran pdf2image/poppler per page; when pdftoppm isn't
+installed that step is approximated by reopening the PDF with PyMuPDF for
+every page. When the tesseract binary is missing, OCR is replaced by a
+fixed per-page sleep (--stub-ocr-seconds) and the output says so.
+
+    python scripts/bench_ocr.py --pages 50
+"""
+import argparse
+import shutil
+import time
+from bench_stubs import ROOT, bench_env, fake_text
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--stub-ocr-seconds", type=float, default=0.8)
+    return parser.parse_args()
+
+def scanned_pdf(path, pages: int):
+    # Every page is a single image of rendered text, like a scanner's output
+    import fitz
+
+    doc = fitz.open()
+    for n in range(pages):
+        source = fitz.open()
+        page = source.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 545, 790), fake_text(n, words=400), fontsize=10)
+        pix = page.get_pixmap(dpi=150, colorspace=fitz.csGRAY)
+        source.close()
+
+        scanned = doc.new_page()
+        scanned.insert_image(scanned.rect, pixmap=pix)
+    doc.save(path)
+    doc.close()
+
+def main(args):
+    bench_env(OCR_CACHE_DB="")
+
+    import fitz
+    import pytesseract
+    from src.utils import ocr
+
+    real_ocr = shutil.which("tesseract") is not None
+    if not real_ocr:
+        def image_to_string(image, lang=None):
+            time.sleep(args.stub_ocr_seconds)
+            return fake_text(image.width, words=200)
+        pytesseract.image_to_string = image_to_string
+
+    poppler = shutil.which("pdftoppm") is not None
+    path = ROOT / "cache" / "bench_scanned.pdf"
+    scanned_pdf(str(path), args.pages)
+    page_numbers = list(range(1, args.pages + 1))
+
+    print(
+        f"{args.pages} scanned pages at {args.dpi} dpi; OCR: "
+        + ("tesseract" if real_ocr else f"stub, {args.stub_ocr_seconds * 1000:.0f} ms/page")
+        + "; old render: " + ("pdf2image per page" if poppler else "PyMuPDF reopen per page")
+    )
+
+    def render_per_page(page_no):
+        if poppler:
+            from pdf2image import convert_from_path
+            return convert_from_path(str(path), dpi=args.dpi, first_page=page_no, last_page=page_no)[0]
+        with fitz.open(str(path)) as doc:
+            return ocr.pixmap_to_image(ocr.render_page(doc, page_no, args.dpi))
+
+    started = time.perf_counter()
+    render_seconds = 0.0
+    for page_no in page_numbers:
+        render_started = time.perf_counter()
+        image = render_per_page(page_no)
+        render_seconds += time.perf_counter() - render_started
+        ocr.ocr_page_image(image, page_no)
+    elapsed = time.perf_counter() - started
+    print(f"old: per-page render, serial OCR   {elapsed:6.1f}s  (render {render_seconds:.1f}s)")
+
+    started = time.perf_counter()
+    with fitz.open(str(path)) as doc:
+        for page_no in page_numbers:
+            ocr.pixmap_to_image(ocr.render_page(doc, page_no, args.dpi))
+    print(f"single-open render only            {time.perf_counter() - started:6.1f}s")
+
+    for workers in args.workers:
+        ocr.OCR_WORKERS = workers
+        ocr._ocr_pool = None
+        started = time.perf_counter()
+        results = ocr.ocr_pages(str(path), page_numbers, args.dpi)
+        elapsed = time.perf_counter() - started
+        assert len(results) == args.pages
+        print(f"ocr_pages, workers={workers:<2}             {elapsed:6.1f}s")
+        ocr.get_ocr_pool().shutdown()
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,63 @@
+"""
+Vector retrieval latency for one user as the total corpus grows while
+that user's corpus stays fixed, for each CHROMA_PARTITIONING strategy.
+
+"metadata" queries the shared collection with a user_id filter, "tenant"
+queries the user's own collection unfiltered, and "unscoped" is the old
+behaviour: the shared collection with no filter at all.
+
+    python scripts/bench_partitioning.py --chunks-per-user 1000 --users 1 10 50
+"""
+import argparse
+import shutil
+import time
+from bench_stubs import ROOT, bench_env, fake_vector, seed_chunks, summarize_latencies
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks-per-user", type=int, default=1000)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--queries", type=int, default=100)
+    return parser.parse_args()
+
+def main(args):
+    shutil.rmtree(ROOT / "cache" / "bench_chroma", ignore_errors=True)
+    bench_env()
+
+    from src.utils import vector_store
+    from src.services.rag_service import retrieve
+
+    vectors = [fake_vector(f"query {i}") for i in range(args.queries)]
+    seeded = 0
+
+    def measure(label: str, query):
+        query(vectors[0])
+        latencies = []
+        for vector in vectors:
+            started = time.perf_counter()
+            query(vector)
+            latencies.append(time.perf_counter() - started)
+        print(summarize_latencies(f"  {label:<9}", latencies), flush=True)
+
+    for users in args.users:
+        # Every user gets the same number of chunks, stored under both strategies
+        for user_id in range(seeded + 1, users + 1):
+            for mode in ("metadata", "tenant"):
+                vector_store.CHROMA_PARTITIONING = mode
+                seed_chunks(user_id, document_id=user_id, count=args.chunks_per_user, lexical=False)
+        seeded = users
+
+        print(f"{users} users, {users * args.chunks_per_user} chunks in total, {args.chunks_per_user} for the queried user")
+        for mode in ("metadata", "tenant"):
+            vector_store.CHROMA_PARTITIONING = mode
+            measure(mode, lambda vector: retrieve(vector, 5, user_id=1))
+
+        shared = vector_store.get_or_create_collection(vector_store.DEFAULT_COLLECTION)
+        measure("unscoped", lambda vector: shared.query(
+            query_embeddings=[vector],
+            n_results=5,
+            include=["documents", "metadatas", "distances"]
+        ))
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,72 @@
+"""
+Page-sharded PDF analysis on a synthetic multi-page PDF.
+
+Generates a PDF of text pages, with a ruled table on every fifth page,
+then times analyze_pdf for each engine and worker count. workers=1 is
+the serial in-process path.
+
+    python scripts/bench_pdf_extract.py --pages 300 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+import fitz
+from bench_stubs import ROOT, bench_env, fake_text
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--engines", nargs="+", default=["pdfplumber", "pymupdf"])
+    return parser.parse_args()
+
+def synthetic_pdf(path, pages: int):
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 545, 480), fake_text(n, words=350), fontsize=9)
+        if n % 5 == 0:
+            # 6 x 4 ruled table
+            for row in range(7):
+                page.draw_line((50, 500 + row * 40), (545, 500 + row * 40))
+            for col in range(5):
+                x = 50 + col * 123.75
+                page.draw_line((x, 500), (x, 740))
+            for row in range(6):
+                for col in range(4):
+                    page.insert_text((55 + col * 123.75, 525 + row * 40), f"r{row}c{col} {n}", fontsize=9)
+    doc.save(path)
+    doc.close()
+
+def main(args):
+    bench_env()
+    from src.utils import pdf_extract
+
+    path = ROOT / "cache" / "bench_pages.pdf"
+    synthetic_pdf(str(path), args.pages)
+    print(f"{args.pages} pages, {os.cpu_count()} CPU cores")
+
+    for engine in args.engines:
+        pdf_extract.PDF_ENGINE = engine
+        baseline = None
+        for workers in args.workers:
+            pdf_extract.shutdown_pdf_pool()
+            pdf_extract.PDF_EXTRACT_WORKERS = workers
+            if workers > 1:
+                # Start the workers outside the timed run
+                pdf_extract.get_pdf_pool().submit(pdf_extract.count_pages, str(path)).result()
+
+            started = time.perf_counter()
+            pages = pdf_extract.analyze_pdf(str(path))
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            tables = sum(1 for page in pages if page.get("tables"))
+            print(
+                f"{engine:<10} workers={workers:<2} {elapsed:6.2f}s "
+                f"{len(pages) / elapsed:7.1f} pages/s  speedup x{baseline / elapsed:.2f}  "
+                f"pages with tables={tables}"
+            )
+    pdf_extract.shutdown_pdf_pool()
+
+if __name__ == "__main__":
+    main(parse_args())
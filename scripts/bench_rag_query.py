@@ -0,0 +1,91 @@
+"""
+Load test for the RAG query path with stubbed Gemini models.
+
+Compares the old endpoint shape (blocking run_rag_query called inside an
+async handler) with arun_rag_query at several concurrency levels. Every
+question is distinct and no corpus_version is passed, so the answer
+caches never short-circuit a request.
+
+    python scripts/bench_rag_query.py --requests 64 --chunks 5000
+"""
+import argparse
+import asyncio
+import shutil
+import time
+from bench_stubs import ROOT, bench_env, StubEmbeddings, StubLLM, seed_chunks, summarize_latencies
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--embed-latency", type=float, default=0.1)
+    return parser.parse_args()
+
+async def run_load(query, requests: int, concurrency: int):
+    """
+    Closed loop: `concurrency` clients each send their next question as soon
+    as the previous answer arrives. Latency is measured from that moment, so
+    time spent waiting for a blocked event loop counts against the request.
+    """
+    latencies = []
+    timings = []
+    remaining = iter(range(requests))
+    started = time.perf_counter()
+
+    async def client():
+        issued = started
+        for i in remaining:
+            # Let the other clients send theirs before this one goes again
+            await asyncio.sleep(0)
+            result = await query(f"What exercises help knee pain after surgery, case {i}?")
+            finished = time.perf_counter()
+            latencies.append(finished - issued)
+            timings.append(result["timings"])
+            issued = finished
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, timings, time.perf_counter() - started
+
+def mean_timings(timings: list[dict]) -> str:
+    stages = sorted({stage for entry in timings for stage in entry})
+    return " ".join(
+        f"{stage}={sum(entry.get(stage, 0) for entry in timings) / len(timings):.0f}"
+        for stage in stages
+    )
+
+async def main(args):
+    shutil.rmtree(ROOT / "cache" / "bench_chroma", ignore_errors=True)
+    (ROOT / "cache" / "bench_lexical.sqlite").unlink(missing_ok=True)
+    bench_env()
+
+    from src.utils.models import models
+    models._llm = StubLLM(latency=args.llm_latency)
+    models._embeddings = StubEmbeddings(latency=args.embed_latency)
+
+    from src.services import rag_service
+    seed_chunks(user_id=1, document_id=1, count=args.chunks)
+
+    async def blocking(question):
+        # What POST /rag/ask used to do: sync call on the event loop
+        return rag_service.run_rag_query(question, user_id=1)
+
+    async def non_blocking(question):
+        return await rag_service.arun_rag_query(question, user_id=1)
+
+    print(
+        f"{args.requests} requests, {args.chunks} chunks, hybrid retrieval, "
+        f"LLM {args.llm_latency * 1000:.0f}ms, embedding {args.embed_latency * 1000:.0f}ms"
+    )
+    for concurrency in args.concurrency:
+        for name, query in (("run_rag_query (blocking)", blocking), ("arun_rag_query", non_blocking)):
+            latencies, timings, elapsed = await run_load(query, args.requests, concurrency)
+            print(
+                f"c={concurrency:<3} {name:<25} {args.requests / elapsed:6.1f} req/s  "
+                + summarize_latencies("latency", latencies)
+            )
+            print(f"      mean stage ms: {mean_timings(timings)}")
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
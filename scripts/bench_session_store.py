@@ -0,0 +1,83 @@
+"""
+Agent session store under many concurrent conversations.
+
+Drives SessionStore with the SQL backend (SQLite by default, set
+DATABASE_URL for Postgres) through --sessions conversations of --turns
+turns each, --concurrency at a time, with a stub LLM for history
+summarization. Reports per-operation latency, throughput, cache
+behaviour and peak RSS.
+
+    python scripts/bench_session_store.py --sessions 10000
+"""
+import argparse
+import asyncio
+import random
+import resource
+import time
+from bench_stubs import bench_env, StubLLM, summarize_latencies
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=512)
+    parser.add_argument("--message-chars", type=int, default=1200)
+    parser.add_argument("--cache-mb", type=int, default=64)
+    return parser.parse_args()
+
+async def main(args):
+    bench_env(AGENT_SESSION_CACHE_MAX_BYTES=args.cache_mb * 1024 * 1024)
+
+    from src.core.database import Base, engine
+    from src.utils.models import models
+    from src.utils import session_store as sessions
+
+    Base.metadata.drop_all(bind=engine, tables=[sessions.AgentSession.__table__])
+    Base.metadata.create_all(bind=engine, tables=[sessions.AgentSession.__table__])
+
+    llm = StubLLM(latency=0.3)
+    models._llm = llm
+    store = sessions.SessionStore(sessions.SqlSessionBackend())
+
+    loads, saves = [], []
+    limit = asyncio.Semaphore(args.concurrency)
+    text = "physiotherapy " * (args.message_chars // 14)
+
+    async def conversation(user_id: int):
+        conversation_id = f"bench-{user_id}"
+        for turn in range(args.turns):
+            async with limit:
+                started = time.perf_counter()
+                state = await asyncio.to_thread(store.load, user_id, conversation_id)
+                loads.append(time.perf_counter() - started)
+
+                state.chat_history.append({"role": "user", "content": f"Q{turn} {text}"})
+                state.chat_history.append({"role": "assistant", "content": f"A{turn} {text}"})
+
+                started = time.perf_counter()
+                await asyncio.to_thread(store.save, state)
+                saves.append(time.perf_counter() - started)
+
+                sessions.schedule_compaction(store, state)
+            # Think time between turns
+            await asyncio.sleep(random.uniform(0, 0.05))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(i) for i in range(1, args.sessions + 1)))
+    elapsed = time.perf_counter() - started
+
+    while sessions._compaction_tasks:
+        await asyncio.gather(*list(sessions._compaction_tasks))
+    total = time.perf_counter() - started
+
+    turns = args.sessions * args.turns
+    print(f"{args.sessions} sessions x {args.turns} turns, concurrency {args.concurrency}")
+    print(f"turns: {turns} in {elapsed:.1f}s ({turns / elapsed:.0f} turns/s); compactions drained after {total:.1f}s")
+    print(summarize_latencies("load", loads))
+    print(summarize_latencies("save", saves))
+    print(f"summarization calls: {llm.calls}")
+    print(f"cache: {store.cache.info()}")
+    print(f"peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
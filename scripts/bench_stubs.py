@@ -0,0 +1,155 @@
+"""
+Stand-ins for the remote Gemini models, used by the bench_*.py scripts.
+Latencies are simulated with sleeps so the pipeline around them can be
+measured without API keys or quota.
+"""
+import asyncio
+import hashlib
+import itertools
+import os
+import random
+import sys
+import time
+from pathlib import Path
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessageChunk
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+def bench_env(**overrides):
+    # Settings the app reads at import time; a throwaway SQLite DB by default
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{ROOT / 'cache' / 'bench.sqlite'}")
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE", "30")
+    os.environ.setdefault("REFRESH_TOKEN_EXPIRE", "7")
+    # Keep benchmark data away from the app's stores
+    os.environ.setdefault("CHROMA_PATH", str(ROOT / "cache" / "bench_chroma"))
+    os.environ.setdefault("LEXICAL_INDEX_DB", str(ROOT / "cache" / "bench_lexical.sqlite"))
+    for key, value in overrides.items():
+        os.environ.setdefault(key, str(value))
+    (ROOT / "cache").mkdir(exist_ok=True)
+
+WORDS = (
+    "knee shoulder lumbar cervical strength mobility stretch pain swelling gait "
+    "balance posture tendon ligament fracture surgery recovery session exercise "
+    "therapy manual ultrasound heat ice range motion flexion extension patient"
+).split()
+
+# Zipf-like vocabulary so BM25 postings have a realistic spread
+VOCABULARY = WORDS + [f"term{i}" for i in range(20000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 10) for rank in range(len(VOCABULARY))))
+
+def fake_text(seed: int, words: int = 120) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=words))
+
+def seed_chunks(user_id: int, document_id: int, count: int, batch: int = 5000, lexical: bool = True):
+    """
+    Store count synthetic chunks for one user's document in Chroma and
+    the BM25 index, the way an ingestion job would.
+    """
+    from src.utils.vector_store import get_user_collection
+    from src.utils.lexical_index import get_lexical_index
+
+    collection = get_user_collection(user_id)
+    ids = [f"{document_id}_{i}" for i in range(count)]
+    texts = [fake_text(document_id * 1_000_003 + i) for i in range(count)]
+    for start in range(0, count, batch):
+        collection.add(
+            ids=ids[start:start + batch],
+            documents=texts[start:start + batch],
+            embeddings=[fake_vector(t) for t in texts[start:start + batch]],
+            metadatas=[{
+                "filename": f"doc{document_id}.pdf",
+                "user_id": user_id,
+                "document_id": document_id
+            }] * len(ids[start:start + batch])
+        )
+    if lexical:
+        get_lexical_index().add_document(user_id, document_id, f"doc{document_id}.pdf", ids, texts)
+
+def fake_vector(text: str, dim: int = 768) -> list[float]:
+    # Deterministic per text, spread like real embeddings
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32).tolist()
+
+class StubEmbeddings(Embeddings):
+    def __init__(self, latency: float = 0.1, per_text: float = 0.002):
+        self.latency = latency
+        self.per_text = per_text
+        self.calls = 0
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        time.sleep(self.latency + self.per_text * len(texts))
+        return [fake_vector(t) for t in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        self.texts += 1
+        time.sleep(self.latency)
+        return fake_vector(text)
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        await asyncio.sleep(self.latency + self.per_text * len(texts))
+        return [fake_vector(t) for t in texts]
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        self.texts += 1
+        await asyncio.sleep(self.latency)
+        return fake_vector(text)
+
+class StubResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+class StubLLM:
+    """
+    Fixed latency plus a per-input-token cost; streams its answer in
+    a handful of chunks.
+    """
+
+    def __init__(self, latency: float = 0.5, per_token: float = 2e-6, answer: str = "Stub answer. " * 20):
+        self.latency = latency
+        self.per_token = per_token
+        self.answer = answer
+        self.calls = 0
+
+    def _delay(self, prompt) -> float:
+        return self.latency + len(str(prompt)) / 4 * self.per_token
+
+    def invoke(self, prompt, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self._delay(prompt))
+        return StubResponse(self.answer)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self._delay(prompt))
+        return StubResponse(self.answer)
+
+    async def astream(self, prompt, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self._delay(prompt))
+        for i in range(0, len(self.answer), 40):
+            await asyncio.sleep(0.005)
+            yield AIMessageChunk(content=self.answer[i:i + 40])
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def summarize_latencies(name: str, values: list[float]) -> str:
+    return (
+        f"{name}: n={len(values)} p50={percentile(values, 50) * 1000:.1f}ms "
+        f"p95={percentile(values, 95) * 1000:.1f}ms p99={percentile(values, 99) * 1000:.1f}ms"
+    )
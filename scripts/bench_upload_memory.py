@@ -0,0 +1,100 @@
+"""
+Peak memory while handling concurrent large PDF uploads.
+
+"read" is the old handler: await file.read(), hash the bytes and open
+the PDF from memory. "spool" is spool_upload: stream to a temp file
+in 1 MB chunks while hashing, then open the PDF from its path. Both then
+open the document and count its pages. Each variant runs in a fresh
+process so ru_maxrss is its own peak.
+
+    python scripts/bench_upload_memory.py --uploads 10 --size-mb 100
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import resource
+import subprocess
+import sys
+import time
+from bench_stubs import ROOT, bench_env
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--variant", choices=["read", "spool"])
+    return parser.parse_args()
+
+def large_pdf(path, size_mb: int):
+    # Incompressible page images, so the file really is size_mb on disk
+    import fitz
+
+    if path.exists() and path.stat().st_size >= size_mb * 1024 * 1024:
+        return
+    doc = fitz.open()
+    image_bytes = 2 * 1024 * 1024
+    for _ in range(max(1, size_mb * 1024 * 1024 // image_bytes)):
+        pix = fitz.Pixmap(fitz.csGRAY, 2048, 1024, os.urandom(image_bytes), False)
+        doc.new_page().insert_image(fitz.Rect(0, 0, 595, 842), pixmap=pix)
+    doc.save(path)
+    doc.close()
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def run_variant(args, path):
+    import fitz
+    from starlette.datastructures import UploadFile
+    from src.services.ingestion_service import spool_upload
+
+    baseline = peak_rss_mb()
+
+    async def read(upload):
+        content = await upload.read()
+        hashlib.sha256(content).hexdigest()
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            return doc.page_count
+
+    async def spool(upload):
+        tmp_path, _ = await spool_upload(upload)
+        try:
+            with fitz.open(str(tmp_path)) as doc:
+                return doc.page_count
+        finally:
+            tmp_path.unlink()
+
+    handler = read if args.variant == "read" else spool
+    uploads = [
+        UploadFile(open(path, "rb"), size=path.stat().st_size, filename="large.pdf")
+        for _ in range(args.uploads)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(upload) for upload in uploads))
+    elapsed = time.perf_counter() - started
+
+    peak = peak_rss_mb()
+    print(
+        f"{args.variant:<5} {args.uploads} x {path.stat().st_size / 1024 / 1024:.0f} MB: "
+        f"{elapsed:5.1f}s  peak RSS {peak:6.0f} MB  "
+        f"(+{peak - baseline:.0f} MB, {(peak - baseline) / args.uploads:.1f} MB per upload)"
+    )
+
+def main(args):
+    bench_env(UPLOAD_SPOOL_DIR=ROOT / "cache" / "bench_spool")
+    path = ROOT / "cache" / f"bench_{args.size_mb}mb.pdf"
+
+    if args.variant:
+        asyncio.run(run_variant(args, path))
+        return
+
+    large_pdf(path, args.size_mb)
+    for variant in ("read", "spool"):
+        subprocess.run(
+            [sys.executable, __file__, "--variant", variant,
+             "--uploads", str(args.uploads), "--size-mb", str(args.size_mb)],
+            check=True
+        )
+
+if __name__ == "__main__":
+    main(parse_args())
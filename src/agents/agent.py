@@ -4,7 +4,8 @@ from src.agents.rag_tool import rag_tool
 from src.agents.insight_tools import (
     summarize_tool,
     topic_tool,
-    sentiment_tool
+    sentiment_tool,
+    overview_tool
 )
 
 model = models.llm
@@ -21,6 +22,7 @@ RULES:
      - summarize_tool
      - topic_tool
      - sentiment_tool
+   - For an overview that needs more than one of these, use overview_tool once.
 
 2. For factual, explanatory, or question-answering queries:
    - Use rag_tool.
@@ -38,7 +40,8 @@ agent = create_agent(
         rag_tool,
         summarize_tool,
         topic_tool,
-        sentiment_tool
+        sentiment_tool,
+        overview_tool
     ],
     system_prompt=SYSTEM_PROMPT,
 )
\ No newline at end of file
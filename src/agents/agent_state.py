@@ -1,7 +1,39 @@
 class AgentState:
-    def __init__(self):
-        self.user_id = None
+    def __init__(self, user_id=None, conversation_id=None):
+        self.user_id = user_id
+        self.conversation_id = conversation_id
         self.active_document_id = None
         self.chat_history = []
+        # Compact summary of turns dropped from chat_history
+        self.summary = None
         self.last_query = None
-        self.retrieved_docs = None
\ No newline at end of file
+        self.retrieved_docs = None
+
+    def messages(self) -> list[dict]:
+        # Earlier turns ride along with the oldest kept user message
+        if not self.summary or not self.chat_history:
+            return list(self.chat_history)
+
+        first = self.chat_history[0]
+        return [
+            {
+                "role": first["role"],
+                "content": f"(Summary of our earlier conversation: {self.summary})\n\n{first['content']}"
+            },
+            *self.chat_history[1:]
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "active_document_id": self.active_document_id,
+            "chat_history": list(self.chat_history),
+            "summary": self.summary
+        }
+
+    @classmethod
+    def from_dict(cls, user_id, conversation_id, data: dict):
+        state = cls(user_id, conversation_id)
+        state.active_document_id = data.get("active_document_id")
+        state.chat_history = list(data.get("chat_history") or [])
+        state.summary = data.get("summary")
+        return state
@@ -1,14 +1,9 @@
 from langchain.tools import tool
-from src.utils.models import models
-from src.core.database import get_db
-from src.utils.document_store import load_full_documents
+from src.core.database import SessionLocal
+from src.services.insight_service import get_insight, get_insights
 from langchain_core.runnables import RunnableConfig
 
-@tool
-def summarize_tool(config: RunnableConfig):
-    """
-    Summarize the selected physiotherapy document.
-    """
+def document_insight(config: RunnableConfig, insight_type: str | None = None) -> str:
     state = config["configurable"]["agent_state"]
     if not state.user_id:
         return "No user context available."
@@ -16,100 +11,62 @@ def summarize_tool(config: RunnableConfig):
     if not state.active_document_id:
         return "No document selected."
 
-    db = next(get_db())
-    raw_text = load_full_documents(
-        user_id=state.user_id,
-        db=db,
-        document_id=state.active_document_id
-    )
-
-    if not raw_text:
+    # Summary, topic and sentiment come from one structured call and are
+    # served from the document_insights table afterwards
+    with SessionLocal() as db:
+        try:
+            if insight_type is None:
+                insights = get_insights(
+                    db,
+                    user_id=state.user_id,
+                    document_id=state.active_document_id
+                )
+                if insights is None:
+                    return "Document not found."
+                return (
+                    f"Summary:\n{insights['summary']}\n\n"
+                    f"Topic: {insights['topic']}\n\n"
+                    f"Sentiment: {insights['sentiment']}"
+                )
+
+            insight = get_insight(
+                db,
+                user_id=state.user_id,
+                document_id=state.active_document_id,
+                insight_type=insight_type
+            )
+        except ValueError:
+            return "Could not extract insights from this document. Please try again."
+
+    if insight is None:
         return "Document not found."
 
-    prompt = f"""
-Summarize the following medical/physiotherapy document clearly and concisely.
-Return 5 bullet points.
+    return insight
 
-Document:
-{raw_text}
-"""
-    response = models.llm.invoke(prompt)
-    return response.content
+@tool
+def summarize_tool(config: RunnableConfig):
+    """
+    Summarize the selected physiotherapy document.
+    """
+    return document_insight(config, "summary")
 
 @tool
 def topic_tool(config: RunnableConfig):
     """
     Identify the relevant topics for the selected document.
     """
-    state = config["configurable"]["agent_state"]
-    if not state.user_id:
-        return "No user context available."
-
-    if not state.active_document_id:
-        return "No document selected."
-
-    db = next(get_db())
-    raw_text = load_full_documents(
-        user_id=state.user_id,
-        db=db,
-        document_id=state.active_document_id
-    )
-
-    if not raw_text:
-        return "Document not found."
-
-    prompt = f"""
-Identify the most relevant topic for the following physiotherapy document.
-
-Choose or infer one:
-- exercise therapy
-- manual therapy
-- electrotherapy
-- pain management
-- rehabilitation
-
-Document:
-{raw_text}
-
-Return the topic name and a brief explanation.
-"""
-    response = models.llm.invoke(prompt)
-    return response.content.strip()
+    return document_insight(config, "topic")
 
 @tool
 def sentiment_tool(config: RunnableConfig):
     """
     Analyze sentiment of the selected physiotherapy document.
     """
-    state = config["configurable"]["agent_state"]
-    if not state.user_id:
-        return "No user context available."
-
-    if not state.active_document_id:
-        return "No document selected."
+    return document_insight(config, "sentiment")
 
-    db = next(get_db())
-    raw_text = load_full_documents(
-        user_id=state.user_id,
-        db=db,
-        document_id=state.active_document_id
-    )
-
-    if not raw_text:
-        return "Document not found."
-
-    prompt = f"""
-Analyze the sentiment of the following physiotherapy document.
-
-Classify as:
-- Positive
-- Neutral
-- Negative
-
-Document:
-{raw_text}
-
-Return sentiment and a short explanation.
-"""
-    response = models.llm.invoke(prompt)
-    return response.content
\ No newline at end of file
+@tool
+def overview_tool(config: RunnableConfig):
+    """
+    Give an overview of the selected physiotherapy document: summary, topic and sentiment together.
+    """
+    return document_insight(config)
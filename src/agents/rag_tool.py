@@ -1,9 +1,19 @@
 from langchain.tools import tool
+from langchain_core.runnables import RunnableConfig
 from src.services.rag_service import run_rag_query
     
 @tool
-def rag_tool(query: str, k: int = 5):
+def rag_tool(query: str, config: RunnableConfig, k: int = 5):
     """
     Perform Retrieval-Augmented Generation over stored documents.
     """
-    return run_rag_query(query, k)
\ No newline at end of file
+    state = config["configurable"]["agent_state"]
+    if not state.user_id:
+        return "No user context available."
+
+    return run_rag_query(
+        query,
+        k,
+        user_id=state.user_id,
+        document_id=state.active_document_id
+    )
\ No newline at end of file
@@ -1,28 +1,84 @@
+import uuid
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import ToolMessage
 from pydantic import BaseModel
 from src.models.users import User
 from src.utils.subscription import require_active_subscription
 from src.agents.agent import agent
 from src.agents.agent_state import AgentState
-from src.utils.agent_dependencies import get_agent_state
+from src.utils.agent_dependencies import get_session_store
+from src.utils.session_store import SessionStore, schedule_compaction
+from src.utils.streaming import sse_event, content_text
 
 router = APIRouter(prefix="/agent", tags=["AI-Agent"])
 
 class AgentRequest(BaseModel):
     query: str
     document_id: int | None = None
+    # Continue an earlier conversation; a new one is started when omitted
+    conversation_id: str | None = None
+    stream: bool = False
+
+async def save_reply(store: SessionStore, state: AgentState, answer: str):
+    # Save assistant reply to memory
+    state.chat_history.append({
+        "role": "assistant",
+        "content": answer
+    })
+    await run_in_threadpool(store.save, state)
+
+async def stream_agent_events(state: AgentState, store: SessionStore):
+    answer = ""
+
+    try:
+        async for chunk, metadata in agent.astream(
+            {
+                "messages": state.messages()
+            },
+            config={
+                "configurable": {
+                    "agent_state": state
+                }
+            },
+            stream_mode="messages"
+        ):
+            # Tool results arrive before the final answer is generated
+            if isinstance(chunk, ToolMessage):
+                yield sse_event("tool", {"name": chunk.name})
+                continue
+
+            if metadata.get("langgraph_node") != "model":
+                continue
+
+            text = content_text(chunk.content)
+            if text:
+                answer += text
+                yield sse_event("token", {"text": text})
+
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+
+    await save_reply(store, state, answer)
+    # Summarize older turns in the background once the history outgrows its budget
+    schedule_compaction(store, state)
+
+    yield sse_event("done", {"response": answer, "conversation_id": state.conversation_id})
 
 @router.post("/ask")
 async def ask_agent(
     request: AgentRequest,
-    state: AgentState = Depends(get_agent_state),
+    store: SessionStore = Depends(get_session_store),
     current_user: User = Depends(require_active_subscription)
 ):
     if not current_user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    # Attach user to state
-    state.user_id = current_user.id
+    # Load the user's conversation (history and summary persist between requests)
+    conversation_id = request.conversation_id or uuid.uuid4().hex
+    state = await run_in_threadpool(store.load, current_user.id, conversation_id)
 
     state.active_document_id = request.document_id
 
@@ -33,14 +89,17 @@ async def ask_agent(
     })
     state.last_query = request.query
 
-    # Sliding window
-    MAX_TURNS = 5
-    state.chat_history = state.chat_history[-MAX_TURNS:]
+    # Stream tokens as the model produces them
+    if request.stream:
+        return StreamingResponse(
+            stream_agent_events(state, store),
+            media_type="text/event-stream"
+        )
 
     # Inject memory into agent
     result = agent.invoke(
         {
-            "messages": state.chat_history
+            "messages": state.messages()
         },
         config={
             "configurable": {
@@ -56,10 +115,7 @@ async def ask_agent(
     if isinstance(content, list):
         content = content[0].get("text", "")
 
-    # Save assistant reply to memory
-    state.chat_history.append({
-        "role": "assistant",
-        "content": content
-    })
+    await save_reply(store, state, content)
+    schedule_compaction(store, state)
 
-    return {"response": content}
\ No newline at end of file
+    return {"response": content, "conversation_id": state.conversation_id}
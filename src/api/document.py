@@ -1,48 +1,53 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
 from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
 from src.models.users import User
 from src.utils.subscription import require_active_subscription
-from src.services.document_service import extract_text_from_file, chunk_text, embed_chunks
-from src.utils.vector_store import get_or_create_collection
+from src.services.document_service import CHUNKING_MODES, SUPPORTED_EXTENSIONS
+from src.services.ingestion_service import new_job_id, spool_upload, claim_spool, submit_job
 from src.core.database import get_db
 from src.models.documents import Document
-import hashlib
+from src.models.ingestion_jobs import IngestionJob
+from src.utils.pdf_extract import engine_stats
+from src.utils.ocr import ocr_cache_stats
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
-# Data Ingestion Pipeline --> 
-# Upload document
-# Extract text from document
-# Preprocess text from text
-# Chunk the documents
-# Generate embeddings for chunks
-# Store chunks and embeddings into vector DB
+# Upload document --> store Document row --> queue ingestion job
+# (extract, preprocess, chunk, embed and store run in src/services/ingestion_service.py)
 
 @router.post("/upload")
 async def upload_document(
     file: UploadFile = File(...),
-    current_user: User = Depends(require_active_subscription)
+    chunking: str = Form("semantic"),
+    current_user: User = Depends(require_active_subscription),
+    db: Session = Depends(get_db)
     ):
 
     if not current_user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    try:
-        # Extract text
-        text_content = await extract_text_from_file(file)
-
-        # Save raw text to PostgreSQL
+    if chunking not in CHUNKING_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"chunking must be one of {', '.join(CHUNKING_MODES)}"
+        )
 
-        content_hash = hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Unsupported file format")
 
-        db = next(get_db())
+    # Spool to disk in chunks (hashing as we go) instead of reading it into memory
+    tmp_path, raw_hash = await spool_upload(file)
 
+    try:
+        # Byte-identical re-uploads are rejected before any extraction
         existing_doc = db.query(Document).filter(
             Document.user_id == current_user.id,
-            Document.content_hash == content_hash
+            Document.raw_hash == raw_hash
         ).first()
 
         if existing_doc:
+            tmp_path.unlink(missing_ok=True)
             return JSONResponse(
                 status_code=409,
                 content={
@@ -50,51 +55,92 @@ async def upload_document(
                     "document_id": existing_doc.id
                 }
             )
-        
+
+        # Text is filled in by the ingestion worker
         doc_record = Document(
             user_id=current_user.id,
             filename=file.filename,
-            content=text_content,
-            content_hash=content_hash
+            content="",
+            raw_hash=raw_hash
         )
-        
+
         db.add(doc_record)
         db.commit()
         db.refresh(doc_record)
-    
-        # Chunk text
-        chunks = chunk_text(text_content)
-        # for i, ch in enumerate(chunks):
-        #     print(f"\n===== CHUNK {i+1} (len={len(ch)}) =====")
-        #     print(ch)
-
-        # Create embeddings
-        embeddings = embed_chunks(chunks)
-
-        # for i in range(len(chunks)-1):
-        #     sim = util.cos_sim(embeddings[i], embeddings[i+1])
-        #     print(i, float(sim))
-
-        # Store in vector DB (ChromaDB)
-        collection = get_or_create_collection("physio_docs")
-
-        # Generate unique IDs for each chunk
-        ids = [f"{doc_record.id}_{i}" for i in range(len(chunks))]
-
-        # Add to ChromaDB
-        collection.add(
-            ids=ids,
-            documents=chunks,
-            embeddings=embeddings,
-            metadatas=[{"filename": file.filename, "user_id": current_user.id}] * len(chunks)
+
+        job = IngestionJob(
+            id=new_job_id(),
+            user_id=current_user.id,
+            document_id=doc_record.id,
+            filename=file.filename,
+            chunking=chunking,
+            status="queued"
         )
 
-        return JSONResponse(content={
-            "message": "Document stored successfully",
-            "filename": file.filename,
-            "document_id": doc_record.id,
-            "total_chunks": len(chunks)
-        })
+        db.add(job)
+        db.commit()
+        claim_spool(tmp_path, job.id)
+
+        submit_job(job.id)
+
+        return JSONResponse(
+            status_code=202,
+            content={
+                "message": "Document queued for ingestion",
+                "filename": file.filename,
+                "document_id": doc_record.id,
+                "job_id": job.id,
+                "status_url": f"/documents/jobs/{job.id}"
+            }
+        )
 
     except Exception as e:
+        tmp_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs/{job_id}")
+def get_ingestion_job(
+    job_id: str,
+    current_user: User = Depends(require_active_subscription),
+    db: Session = Depends(get_db)
+):
+    job = db.query(IngestionJob).filter(
+        IngestionJob.id == job_id,
+        IngestionJob.user_id == current_user.id
+    ).first()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "document_id": job.document_id,
+        "chunking": job.chunking,
+        "pages_processed": job.pages_processed,
+        "total_pages": job.total_pages,
+        "chunks_embedded": job.chunks_embedded,
+        "chunks_to_embed": job.chunks_to_embed,
+        "total_chunks": job.total_chunks,
+        "embedding_cache_hits": job.embedding_cache_hits,
+        "embedding_cache_hit_ratio": (
+            round(job.embedding_cache_hits / job.embedding_cache_lookups, 4)
+            if job.embedding_cache_lookups else None
+        ),
+        "window_cache_hits": job.window_cache_hits,
+        "window_cache_hit_ratio": (
+            round(job.window_cache_hits / job.window_cache_lookups, 4)
+            if job.window_cache_lookups else None
+        ),
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+@router.get("/stats")
+def extraction_stats(current_user: User = Depends(require_active_subscription)):
+    return {
+        "pdf_engines": engine_stats(),
+        "ocr_cache": ocr_cache_stats()
+    }
@@ -1,9 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from src.models.users import User
 from src.utils.subscription import require_active_subscription
-from src.services.rag_service import run_rag_query
+from src.utils.auth_dependencies import get_current_user
+from src.services.rag_service import (
+    RETRIEVAL_MODES,
+    answer_cache,
+    semantic_cache,
+    arun_rag_query,
+    astream_rag_query
+)
 from src.utils.models import models
+from src.utils.streaming import sse_event
 import os
 import json
 
@@ -18,6 +27,28 @@ router = APIRouter(prefix="/rag", tags=["RAG"])
 class AskRequest(BaseModel):
     question: str
     k: int = 5
+    document_id: int | None = None
+    # "vector", "hybrid" or "lexical"; defaults to RAG_RETRIEVAL_MODE
+    retrieval: str | None = None
+    stream: bool = False
+
+async def stream_rag_events(payload: AskRequest, user_id: int, corpus_version: int):
+    try:
+        async for event, data in astream_rag_query(
+            payload.question,
+            payload.k,
+            user_id=user_id,
+            document_id=payload.document_id,
+            mode=payload.retrieval,
+            corpus_version=corpus_version
+        ):
+            if event == "token":
+                data = {"text": data}
+            elif event == "done":
+                data = {"answer": data}
+            yield sse_event(event, data)
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
 
 # RAG Endpoint
 @router.post("/ask")
@@ -25,8 +56,28 @@ async def ask_rag(payload: AskRequest, current_user: User = Depends(require_acti
     if not current_user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
+    if payload.retrieval is not None and payload.retrieval not in RETRIEVAL_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"retrieval must be one of {', '.join(RETRIEVAL_MODES)}"
+        )
+
+    # Snippet metadata first, then answer tokens as Gemini produces them
+    if payload.stream:
+        return StreamingResponse(
+            stream_rag_events(payload, current_user.id, current_user.corpus_version),
+            media_type="text/event-stream"
+        )
+
     try:
-        result = run_rag_query(payload.question, payload.k)
+        result = await arun_rag_query(
+            payload.question,
+            payload.k,
+            user_id=current_user.id,
+            document_id=payload.document_id,
+            mode=payload.retrieval,
+            corpus_version=current_user.corpus_version
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -53,8 +104,13 @@ async def evaluate_rag():
         context_precision,
         context_recall
     )
+    # Retrieval is scoped per user, so evaluation runs against one user's corpus
+    eval_user_id = os.getenv("EVAL_USER_ID")
+    if not eval_user_id:
+        raise HTTPException(status_code=400, detail="EVAL_USER_ID is not configured")
+
     # Build RAGAS dataset using your RAG pipeline
-    dataset = build_ragas_dataset(test_data)
+    dataset = build_ragas_dataset(test_data, user_id=int(eval_user_id))
 
     # Create Gemini LLM
     gemini_llm = get_gemini_llm()
@@ -77,4 +133,12 @@ async def evaluate_rag():
         )
     )
 
-    return result.scores
\ No newline at end of file
+    return result.scores
+
+@router.get("/cache/stats")
+def cache_stats(current_user: User = Depends(get_current_user)):
+    return {
+        "embeddings": models.embeddings.stats(),
+        "answers": answer_cache.info(),
+        "semantic_answers": semantic_cache.info()
+    }
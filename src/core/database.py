@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -18,4 +18,36 @@ def get_db():
 	try:
 		yield db
 	finally:
-		db.close()
\ No newline at end of file
+		db.close()
+
+# Columns added to tables that existing databases already have. create_all
+# only creates missing tables, so these are added on startup if absent.
+# (table, column, column DDL, index name or None)
+ADDED_COLUMNS = [
+	("documents", "raw_hash", "VARCHAR(64)", "ix_documents_raw_hash"),
+	("users", "corpus_version", "INTEGER NOT NULL DEFAULT 0", None),
+	("ingestion_jobs", "window_cache_hits", "INTEGER", None),
+	("ingestion_jobs", "window_cache_lookups", "INTEGER", None),
+]
+
+def ensure_columns():
+	for table, column, ddl, index in ADDED_COLUMNS:
+		inspector = inspect(engine)
+		if not inspector.has_table(table):
+			continue
+
+		if column not in {c["name"] for c in inspector.get_columns(table)}:
+			try:
+				with engine.begin() as conn:
+					conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+			except Exception as e:
+				# Another worker may have added it first
+				if column not in {c["name"] for c in inspect(engine).get_columns(table)}:
+					raise RuntimeError(
+						f"Database is missing {table}.{column} and it could not be added ({e}). "
+						f"Run: ALTER TABLE {table} ADD COLUMN {column} {ddl}"
+					) from e
+
+		if index:
+			with engine.begin() as conn:
+				conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({column})"))
@@ -1,6 +1,14 @@
 from fastapi import FastAPI
-from src.core.database import Base, engine
+from src.core.database import Base, engine, ensure_columns
 from src.api import auth, document, rag, agent, billing
+from src.utils.vector_store import init_chroma_client, close_chroma_client, migrate_legacy_chunks
+from src.services.ingestion_service import (
+    backfill_lexical_index,
+    resume_pending_jobs,
+    shutdown_ingestion
+)
+from src.utils.pdf_extract import shutdown_pdf_pool
+from src.utils.session_store import session_store
 import src.core.logging_config
 
 app = FastAPI()
@@ -8,6 +16,18 @@ app = FastAPI()
 @app.on_event("startup")
 def startup():
     Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    init_chroma_client()
+    migrate_legacy_chunks()
+    backfill_lexical_index()
+    resume_pending_jobs()
+    session_store.purge_expired()
+
+@app.on_event("shutdown")
+def shutdown():
+    shutdown_ingestion()
+    shutdown_pdf_pool()
+    close_chroma_client()
 
 @app.get("/")
 def root():
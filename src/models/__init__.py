@@ -1,4 +1,8 @@
 from src.models.users import User
 from src.models.documents import Document
+from src.models.chunk_embeddings import ChunkEmbedding
+from src.models.ingestion_jobs import IngestionJob
+from src.models.agent_sessions import AgentSession
+from src.models.document_insights import DocumentInsight
 
-__all__ = ["User","Document"]
\ No newline at end of file
+__all__ = ["User","Document","ChunkEmbedding","IngestionJob","AgentSession","DocumentInsight"]
\ No newline at end of file
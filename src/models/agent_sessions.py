@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, JSON, DateTime
+from sqlalchemy.sql import func
+from src.core.database import Base
+
+class AgentSession(Base):
+    __tablename__ = "agent_sessions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    conversation_id = Column(String(64), primary_key=True)
+    active_document_id = Column(Integer, nullable=True)
+
+    # Recent messages verbatim, older turns folded into summary
+    chat_history = Column(JSON, nullable=False, default=list)
+    summary = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, JSON, DateTime
+from sqlalchemy.sql import func
+from src.core.database import Base
+
+class ChunkEmbedding(Base):
+    __tablename__ = "chunk_embeddings"
+
+    # SHA-256 of the normalized chunk text
+    content_hash = Column(String(64), primary_key=True)
+    model = Column(String, primary_key=True)
+    embedding = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
+from sqlalchemy.sql import func
+from src.core.database import Base
+
+class DocumentInsight(Base):
+    __tablename__ = "document_insights"
+
+    # A document's text never changes after upload, so an insight is
+    # valid until its prompt or model changes
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    insight_type = Column(String(32), primary_key=True)  # summary, topic, sentiment
+    prompt_version = Column(String(16), primary_key=True)
+    model = Column(String, primary_key=True)
+
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -10,4 +10,5 @@ class Document(Base):
     filename = Column(String, nullable=False)
     content = Column(Text, nullable=False)  # Store full raw text
     content_hash = Column(String, index=True)
+    raw_hash = Column(String(64), index=True)  # SHA-256 of the uploaded bytes
     created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
+from sqlalchemy.sql import func
+from src.core.database import Base
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String(32), primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
+    filename = Column(String, nullable=False)
+    chunking = Column(String, nullable=False, default="semantic")
+
+    # queued, extracting, chunking, storing, completed, duplicate, failed
+    status = Column(String, nullable=False, default="queued", index=True)
+    error = Column(Text, nullable=True)
+
+    # Progress
+    pages_processed = Column(Integer, nullable=False, default=0)
+    total_pages = Column(Integer, nullable=True)
+    chunks_embedded = Column(Integer, nullable=False, default=0)  # embedding inputs (sentence windows in semantic mode)
+    chunks_to_embed = Column(Integer, nullable=True)
+    total_chunks = Column(Integer, nullable=True)
+    embedding_cache_hits = Column(Integer, nullable=True)
+    embedding_cache_lookups = Column(Integer, nullable=True)
+    window_cache_hits = Column(Integer, nullable=True)  # semantic mode only
+    window_cache_lookups = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -18,6 +18,9 @@ class User(Base):
     subscription_status = Column(String, nullable=True)  # trialing, active, past_due, canceled
     trial_end = Column(DateTime, nullable=True)
     current_period_end = Column(DateTime, nullable=True)
+
+    # Bumped whenever the user's indexed documents change; part of the answer cache key
+    corpus_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
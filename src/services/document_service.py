@@ -1,182 +1,372 @@
-import io
 import re
-import pdfplumber
-import unicodedata
+import hashlib
+import numpy as np
+from collections import Counter
 from docx import Document
-from fastapi import UploadFile
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_experimental.text_splitter import SemanticChunker
-from src.utils.models import models
-from pdf2image import convert_from_bytes
-from src.utils.ocr import analyze_text_confidence, ocr_page_image
+from langchain_experimental.text_splitter import (
+    SemanticChunker,
+    combine_sentences,
+    calculate_cosine_distances
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from src.utils.models import models, EMBEDDING_MODEL, EMBED_BATCH_SIZE, EMBED_MAX_CONCURRENCY
+from src.utils.embedding_cache import normalize_text
+from src.models.chunk_embeddings import ChunkEmbedding
+from src.utils.ocr import ocr_pages
+from src.utils.pdf_extract import analyze_pdf
+from src.utils.text_normalizer import default_normalizer
 import logging
 
 logger = logging.getLogger("document_ocr")
 logger.setLevel(logging.INFO)
 
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".csv")
+
+# Embedding progress is reported after every slice of this many texts
+EMBED_PROGRESS_STEP = EMBED_BATCH_SIZE * EMBED_MAX_CONCURRENCY
+
 # FILE TEXT EXTRACTION
-async def extract_text_from_file(file: UploadFile) -> str:
-    filename = file.filename.lower()
-    content = await file.read()
+# Extractors open the spooled upload from disk instead of holding a bytes copy
+def extract_text_from_file(filename: str, path: str, on_page=None) -> str:
+    filename = filename.lower()
 
     if filename.endswith(".pdf"):
-        return extract_text_from_pdf(content)
+        return extract_text_from_pdf(path, on_page=on_page)
 
     elif filename.endswith(".docx"):
-        return extract_text_from_docx(content)
+        return extract_text_from_docx(path)
 
     elif filename.endswith((".txt", ".csv")):
-        return extract_text_from_txt(content)
+        return extract_text_from_txt(path)
 
     else:
         raise ValueError("Unsupported file format")
 
-
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+def extract_text_from_pdf(path: str, on_page=None) -> str:
     final_text = []
 
-    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-        total_pages = len(pdf.pages)
-
-        for idx, page in enumerate(pdf.pages):
-            page_no = idx + 1
-            logger.info(f"[PAGE {page_no}/{total_pages}] Processing")
-
-            # ---------- Layer 1: Native Text ----------
-            native_text = page.extract_text() or ""
-            confidence = analyze_text_confidence(native_text)
-
-            image_count = len(page.images)
-            tables = page.extract_tables()
-
-            logger.info(
-                f"[PAGE {page_no}] "
-                f"confidence={confidence}, "
-                f"images={image_count}, "
-                f"tables={len(tables)}"
-            )
-
-            page_content = []
-
-            # ---------- Layer 2: Tables ----------
-            if tables:
-                for table in tables:
-                    table_text = "\n".join(
-                        [" | ".join(cell or "" for cell in row) for row in table if row]
-                    )
-                    page_content.append(
-                        f"\n--- TABLE Page {page_no} ---\n{table_text}"
-                    )
-                logger.info(f"[PAGE {page_no}] Tables extracted")
-
-            # ---------- OCR DECISION  ----------
-            run_ocr = (
-                confidence < 0.6 and
-                image_count > 0 and
-                not tables
-            )
-
-            if run_ocr:
-                logger.warning(f"[PAGE {page_no}] OCR triggered")
-
-                # Convert ONLY this page to image
-                page_image = convert_from_bytes(
-                    file_bytes,
-                    dpi=200,
-                    first_page=page_no,
-                    last_page=page_no,
-                    poppler_path=r"C:\poppler-25.12.0\Library\bin"
-                )[0]
-
-                ocr_text = ocr_page_image(page_image, page_no)
-                if ocr_text.strip():
-                    page_content.append(ocr_text)
-            else:
-                logger.info(f"[PAGE {page_no}] OCR skipped")
-
-            # ---------- Native Text ----------
-            if native_text.strip():
-                page_content.append(native_text)
-
-            if page_content:
-                final_text.append("\n".join(page_content))
-
-    combined = "\n\n".join(final_text)
-
-    if not combined.strip():
+    # ---------- Layer 1: Native Text, images and tables (page-parallel) ----------
+    pages = analyze_pdf(path, on_page=on_page)
+    total_pages = len(pages)
+    engines = Counter(page["engine"] for page in pages)
+
+    # ---------- OCR DECISION  ----------
+    ocr_page_numbers = []
+    for page in pages:
+        page_no = page["page_no"]
+        logger.info(
+            f"[PAGE {page_no}/{total_pages}] "
+            f"engine={page['engine']}, "
+            f"confidence={page['confidence']}, "
+            f"images={page['image_count']}, "
+            f"tables={len(page['tables'])}"
+        )
+
+        run_ocr = (
+            page["confidence"] < 0.6 and
+            page["image_count"] > 0 and
+            not page["tables"]
+        )
+
+        if run_ocr:
+            logger.warning(f"[PAGE {page_no}] OCR triggered")
+            ocr_page_numbers.append(page_no)
+            engines[page["engine"] + "+ocr"] += 1
+            engines[page["engine"]] -= 1
+        else:
+            logger.info(f"[PAGE {page_no}] OCR skipped")
+
+    # Render all flagged pages in one pass and OCR them in parallel
+    ocr_texts = ocr_pages(path, ocr_page_numbers)
+
+    for page in pages:
+        page_no = page["page_no"]
+        page_content = []
+
+        # ---------- Layer 2: Tables ----------
+        if page["tables"]:
+            for table in page["tables"]:
+                table_text = "\n".join(
+                    [" | ".join(cell or "" for cell in row) for row in table if row]
+                )
+                page_content.append(
+                    f"\n--- TABLE Page {page_no} ---\n{table_text}"
+                )
+            logger.info(f"[PAGE {page_no}] Tables extracted")
+
+        # ---------- Layer 3: OCR ----------
+        ocr_text = ocr_texts.get(page_no, "")
+        if ocr_text.strip():
+            page_content.append(ocr_text)
+
+        # ---------- Native Text ----------
+        if page["native_text"].strip():
+            page_content.append(page["native_text"])
+
+        if page_content:
+            final_text.append("\n".join(page_content))
+
+    logger.info(f"[PDF] {total_pages} pages, engines: {dict(+engines)}")
+
+    # Normalize page by page instead of as one large string
+    combined = "\n\n".join(default_normalizer.normalize_pages(final_text))
+
+    if not combined:
         raise ValueError("PDF extraction failed")
 
-    return preprocess_text(combined)
+    return combined
 
-def extract_text_from_docx(file_bytes: bytes) -> str:
-    doc = Document(io.BytesIO(file_bytes))
+def extract_text_from_docx(path: str) -> str:
+    doc = Document(path)
     text = "\n".join([p.text for p in doc.paragraphs])
     return preprocess_text(text)
 
-def extract_text_from_txt(file_bytes: bytes) -> str:
-    text = file_bytes.decode("utf-8", errors="ignore")
+def extract_text_from_txt(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
     return preprocess_text(text)
 
 # TEXT PREPROCESSING
 def preprocess_text(text: str) -> str:
-    # Remove null bytes
-    text = text.replace("\x00", "")
+    return default_normalizer.normalize(text)
 
-    # Normalize unicode characters
-    text = unicodedata.normalize("NFKC", text)
+# HYBRID CHUNKING (Semantic → Fallback Recursive)
+CHUNKING_MODES = ("semantic", "recursive")
+
+class PooledSemanticChunker(SemanticChunker):
+    """
+    SemanticChunker that hands back the sentence-window embeddings it
+    computes to find breakpoints, so chunk vectors can be pooled from
+    them instead of embedding every chunk a second time.
+    """
+
+    def split_sentence_groups(self, text: str, embed) -> list[list[dict]]:
+        single_sentences_list = re.split(self.sentence_split_regex, text)
+        sentences = combine_sentences(
+            [{"sentence": x, "index": i} for i, x in enumerate(single_sentences_list)],
+            self.buffer_size
+        )
+
+        vectors = embed([s["combined_sentence"] for s in sentences])
+        for sentence, vector in zip(sentences, vectors):
+            sentence["combined_sentence_embedding"] = vector
+
+        # Percentile breakpoints need at least one distance
+        if len(sentences) == 1:
+            return [sentences]
+
+        distances, sentences = calculate_cosine_distances(sentences)
+        threshold, breakpoint_array = self._calculate_breakpoint_threshold(distances)
+
+        groups = []
+        start_index = 0
+        for index, distance in enumerate(breakpoint_array):
+            if distance > threshold:
+                groups.append(sentences[start_index:index + 1])
+                start_index = index + 1
+
+        if start_index < len(sentences):
+            groups.append(sentences[start_index:])
+
+        return groups
+
+def pool_vectors(vectors: list[list[float]]) -> list[float]:
+    pooled = np.mean(np.asarray(vectors, dtype=np.float32), axis=0)
+    norm = np.linalg.norm(pooled)
+    if norm > 0:
+        pooled = pooled / norm
+    return pooled.tolist()
+
+def chunk_and_embed(
+    text: str,
+    db: Session,
+    mode: str = "semantic",
+    chunk_size: int = 512,
+    chunk_overlap: int = 100,
+    progress=None
+):
+    """
+    Chunk text and return (chunks, vectors, cache) with a single embedding
+    pass, where cache holds the chunk-embedding store hits and lookups
+    (plus sentence-window cache hits and lookups in semantic mode).
+
+    semantic  -> sentence windows are embedded once to find breakpoints;
+                 each chunk vector is the mean of the windows it covers.
+    recursive -> recursive splitting only; each chunk is embedded once.
+    """
+    if mode not in CHUNKING_MODES:
+        raise ValueError(f"Unsupported chunking mode: {mode}")
 
-    # Remove common headers/footers
-    text = re.sub(r"Page\s*\d+\s*(of\s*\d+)?", "", text, flags=re.IGNORECASE)
+    recursive_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=True
+    )
+
+    if mode == "recursive":
+        chunks = recursive_splitter.split_text(text)
+        vectors, cache_hits = embed_chunks(chunks, db, progress=progress)
+        return chunks, vectors, {"hits": cache_hits, "lookups": len(chunks)}
+
+    windows = {"hits": 0, "lookups": 0}
+
+    def embed(texts):
+        vectors, hits = embed_windows(texts, progress=progress)
+        windows["hits"] += hits
+        windows["lookups"] += len(texts)
+        return vectors
 
-    # Replace special bullets safely
-    text = re.sub(r"[•·●■□▪▶➤►]", "-", text)
+    # Semantic Chunker
+    semantic_splitter = PooledSemanticChunker(models.embeddings)
+    groups = semantic_splitter.split_sentence_groups(text, embed)
+
+    final_chunks = []
+    final_vectors = []
+    for group in groups:
+        chunk = " ".join(s["sentence"] for s in group)
+
+        if len(chunk) <= chunk_size:
+            final_chunks.append(chunk)
+            final_vectors.append(pool_vectors([s["combined_sentence_embedding"] for s in group]))
+            continue
+
+        # Recursive fallback for oversized chunks: pool the sentences each piece overlaps
+        spans = []
+        offset = 0
+        for s in group:
+            spans.append((offset, offset + len(s["sentence"]), s["combined_sentence_embedding"]))
+            offset += len(s["sentence"]) + 1
+
+        for piece in recursive_splitter.create_documents([chunk]):
+            start = piece.metadata["start_index"]
+            end = start + len(piece.page_content)
+            covered = [v for (s_start, s_end, v) in spans if s_start < end and s_end > start]
+
+            final_chunks.append(piece.page_content)
+            final_vectors.append(pool_vectors(covered or [s["combined_sentence_embedding"] for s in group]))
+
+    # Only the final chunk vectors go to the chunk-embedding store
+    final_vectors, cache_hits = store_chunk_vectors(final_chunks, final_vectors, db)
+
+    logger.info(
+        f"[CHUNK] mode={mode}, sentence_windows={sum(len(g) for g in groups)}, "
+        f"chunks={len(final_chunks)}"
+    )
 
-    # Abbreviation normalization (medical-friendly)
-    abbreviation_map = {
-        r"\bROM\b": "Range of Motion",
-        r"\bADL\b": "Activities of Daily Living",
-        r"\bWNL\b": "Within Normal Limits",
-        r"\bPT\b": "Physiotherapy",
-        r"\bOT\b": "Occupational Therapy"
+    return final_chunks, final_vectors, {
+        "hits": cache_hits,
+        "lookups": len(final_chunks),
+        "window_hits": windows["hits"],
+        "window_lookups": windows["lookups"]
     }
 
-    for abbr, full in abbreviation_map.items():
-        text = re.sub(abbr, full, text)
+# EMBEDDING
+
+def chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(normalize_text(chunk).encode("utf-8")).hexdigest()
 
-    # Collapse multiple spaces/newlines
-    text = re.sub(r"\n{2,}", "\n\n", text)
-    text = re.sub(r"[ ]{2,}", " ", text)
+def load_chunk_vectors(hashes: list[str], db: Session) -> dict:
+    return {
+        row.content_hash: row.embedding
+        for row in db.query(ChunkEmbedding).filter(
+            ChunkEmbedding.model == EMBEDDING_MODEL,
+            ChunkEmbedding.content_hash.in_(set(hashes))
+        )
+    }
 
-    return text.strip()
+def save_chunk_vectors(vectors: dict, db: Session):
+    if not vectors:
+        return
 
-# HYBRID CHUNKING (Semantic → Fallback Recursive)
-def chunk_text(text: str, chunk_size: int = 512, chunk_overlap: int = 100):
+    for h, vector in vectors.items():
+        db.add(ChunkEmbedding(content_hash=h, model=EMBEDDING_MODEL, embedding=vector))
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent upload stored the same chunk first
+        db.rollback()
+        logger.info("Chunk embeddings already stored by a concurrent upload")
+
+def embed_chunks(chunks: list[str], db: Session, progress=None):
+    """
+    Embed chunks, reusing stored vectors for any chunk text already seen
+    with the same embedding model. Only novel chunks hit the API.
+    Returns (vectors, cache_hits). progress(done, total) is called as
+    slices of novel chunks finish.
+    """
+    hashes = [chunk_hash(c) for c in chunks]
+
+    stored = load_chunk_vectors(hashes, db)
+    cache_hits = sum(1 for h in hashes if h in stored)
+
+    # Embed each novel text once, even if it repeats inside this document
+    text_by_hash = dict(zip(hashes, chunks))
+    novel = [h for h in text_by_hash if h not in stored]
+
+    if progress:
+        progress(cache_hits, len(chunks))
 
     embeddings = models.embeddings
+    fresh = {}
+    for start in range(0, len(novel), EMBED_PROGRESS_STEP):
+        batch = novel[start:start + EMBED_PROGRESS_STEP]
+        vectors = embeddings.embed_documents([text_by_hash[h] for h in batch])
+        fresh.update(zip(batch, vectors))
 
-    # Semantic Chunker
-    semantic_splitter = SemanticChunker(embeddings)
-    semantic_chunks = semantic_splitter.split_text(text)
+        if progress:
+            progress(sum(1 for h in hashes if h in stored or h in fresh), len(chunks))
 
-    # Recursive fallback for oversized chunks
-    recursive_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
+    save_chunk_vectors(fresh, db)
+    stored.update(fresh)
 
-    final_chunks = []
-    for chunk in semantic_chunks:
-        if len(chunk) > chunk_size:
-            final_chunks.extend(recursive_splitter.split_text(chunk))
-        else:
-            final_chunks.append(chunk)
+    logger.info(f"[EMBED] {cache_hits}/{len(chunks)} chunks served from cache")
 
-    return final_chunks
+    return [stored[h] for h in hashes], cache_hits
 
-# EMBEDDING
+def store_chunk_vectors(chunks: list[str], vectors: list[list[float]], db: Session):
+    """
+    Save pooled chunk vectors for chunk texts not stored yet. A chunk text
+    that is already stored keeps its stored vector, so the same text always
+    maps to the same vector. Returns (vectors, cache_hits).
+    """
+    hashes = [chunk_hash(c) for c in chunks]
+
+    stored = load_chunk_vectors(hashes, db)
+    cache_hits = sum(1 for h in hashes if h in stored)
+
+    fresh = {h: v for h, v in zip(hashes, vectors) if h not in stored}
+    save_chunk_vectors(fresh, db)
+
+    logger.info(f"[EMBED] {cache_hits}/{len(chunks)} chunks already stored")
+
+    return [stored.get(h, v) for h, v in zip(hashes, vectors)], cache_hits
+
+def embed_windows(texts: list[str], progress=None):
+    """
+    Embed semantic-chunking sentence windows through the embedding cache
+    only; windows are never written to the chunk-embedding store.
+    Returns (vectors, cache_hits).
+    """
+    # Embed each distinct window once
+    unique = list(dict.fromkeys(texts))
+    by_text = {}
+    cache_hits = 0
 
-def embed_chunks(chunks: list[str]):
     embeddings = models.embeddings
-    vectors = embeddings.embed_documents(chunks)
-    return vectors
\ No newline at end of file
+    for start in range(0, len(unique), EMBED_PROGRESS_STEP):
+        batch = unique[start:start + EMBED_PROGRESS_STEP]
+        vectors, hits = embeddings.embed_documents_with_hits(batch)
+        by_text.update(zip(batch, vectors))
+        cache_hits += hits
+
+        if progress:
+            progress(min(start + len(batch), len(unique)), len(unique))
+
+    # Repeated windows are served from this pass
+    cache_hits += len(texts) - len(unique)
+
+    return [by_text[t] for t in texts], cache_hits
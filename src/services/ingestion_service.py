@@ -0,0 +1,288 @@
+import os
+import uuid
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import UploadFile, HTTPException
+from src.core.database import SessionLocal
+from src.models.documents import Document
+from src.models.users import User
+from src.models.ingestion_jobs import IngestionJob
+from src.services.document_service import extract_text_from_file, chunk_and_embed
+from src.services.insight_service import INSIGHT_EAGER, precompute_insights
+from src.utils.vector_store import get_user_collection
+from src.utils.lexical_index import get_lexical_index
+from src.utils.context_builder import chunk_position
+
+logger = logging.getLogger("ingestion")
+logger.setLevel(logging.INFO)
+
+# Data Ingestion Pipeline (runs in the background) -->
+# Extract text from document
+# Preprocess text from text
+# Chunk the documents
+# Generate embeddings for chunks
+# Store chunks and embeddings into vector DB
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+UPLOAD_SPOOL_DIR = Path(os.getenv("UPLOAD_SPOOL_DIR", "./upload_spool")).resolve()
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+# Jobs in these states were interrupted and are picked up again on startup
+PENDING_STATUSES = ("queued", "extracting", "chunking", "storing")
+
+_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+def spool_path(job_id: str) -> Path:
+    return UPLOAD_SPOOL_DIR / job_id
+
+def upload_too_large():
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit"
+    )
+
+async def spool_upload(file: UploadFile) -> tuple[Path, str]:
+    """
+    Stream the upload to a temp file in fixed-size chunks, hashing the raw
+    bytes as they arrive, so memory use stays flat regardless of file size.
+    Returns (temp path, sha256 hex digest).
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise upload_too_large()
+
+    UPLOAD_SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_SPOOL_DIR, suffix=".part")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(UPLOAD_READ_CHUNK):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise upload_too_large()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return Path(tmp_path), digest.hexdigest()
+
+def claim_spool(tmp_path: Path, job_id: str):
+    os.replace(tmp_path, spool_path(job_id))
+
+def submit_job(job_id: str):
+    _executor.submit(run_ingestion_job, job_id)
+
+def resume_pending_jobs():
+    db = SessionLocal()
+    try:
+        jobs = db.query(IngestionJob).filter(IngestionJob.status.in_(PENDING_STATUSES)).all()
+        for job in jobs:
+            if spool_path(job.id).exists():
+                logger.info(f"[JOB {job.id}] Resuming")
+                submit_job(job.id)
+            else:
+                fail_job(db, job, "Upload data lost before ingestion finished")
+    finally:
+        db.close()
+
+def backfill_lexical_index():
+    # Documents ingested before the BM25 index existed only have vectors;
+    # index their stored chunks once so hybrid retrieval can match them
+    db = SessionLocal()
+    try:
+        indexed = get_lexical_index().document_ids()
+        documents = db.query(Document.id, Document.user_id, Document.filename).all()
+
+        backfilled_users = set()
+        for doc_id, user_id, filename in documents:
+            if doc_id in indexed:
+                continue
+
+            stored = get_user_collection(user_id).get(
+                where={"document_id": doc_id},
+                include=["documents"]
+            )
+            if not stored["ids"]:
+                continue
+
+            ordered = sorted(
+                zip(stored["ids"], stored["documents"]),
+                key=lambda item: (chunk_position(item[0]) or ("", 0))[1]
+            )
+            get_lexical_index().add_document(
+                user_id,
+                doc_id,
+                filename,
+                [chunk_id for chunk_id, _ in ordered],
+                [chunk for _, chunk in ordered]
+            )
+            backfilled_users.add(user_id)
+            logger.info(f"[BACKFILL] Indexed {len(ordered)} chunks of document {doc_id}")
+
+        # Hybrid answers for these users can now differ from the cached ones
+        for user_id in backfilled_users:
+            bump_corpus_version(db, user_id)
+        db.commit()
+    finally:
+        db.close()
+
+def shutdown_ingestion():
+    # Unstarted jobs stay queued in the DB and resume on next startup
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+def bump_corpus_version(db, user_id: int):
+    # Atomic increment so concurrent jobs for one user never lose a bump
+    db.query(User).filter(User.id == user_id).update(
+        {User.corpus_version: User.corpus_version + 1},
+        synchronize_session=False
+    )
+
+def fail_job(db, job: IngestionJob, error: str):
+    # Drop the half-ingested document so a retry isn't rejected as a duplicate
+    doc = db.get(Document, job.document_id) if job.document_id else None
+    if doc is not None:
+        # Vectors may already be stored if a later step failed; drop them with the postings
+        try:
+            get_user_collection(job.user_id).delete(where={"document_id": doc.id})
+        except Exception:
+            logger.exception(f"[JOB {job.id}] Could not remove chunks of document {doc.id}")
+        get_lexical_index().remove_document(doc.id)
+        db.delete(doc)
+        job.document_id = None
+        # Its chunks may already have been searchable
+        bump_corpus_version(db, job.user_id)
+
+    job.status = "failed"
+    job.error = error
+    db.commit()
+
+def run_ingestion_job(job_id: str):
+    # Separate sessions so progress commits never flush pipeline writes
+    db = SessionLocal()
+    job_db = SessionLocal()
+
+    try:
+        job = job_db.get(IngestionJob, job_id)
+        if job is None:
+            logger.error(f"[JOB {job_id}] Not found")
+            return
+
+        def update(**fields):
+            for key, value in fields.items():
+                setattr(job, key, value)
+            job_db.commit()
+
+        completed = None
+        try:
+            # Extract text
+            update(status="extracting")
+            text_content = extract_text_from_file(
+                job.filename,
+                str(spool_path(job_id)),
+                on_page=lambda done, total: update(pages_processed=done, total_pages=total)
+            )
+
+            content_hash = hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+
+            existing_doc = db.query(Document).filter(
+                Document.user_id == job.user_id,
+                Document.content_hash == content_hash,
+                Document.id != job.document_id
+            ).first()
+
+            if existing_doc:
+                placeholder = db.get(Document, job.document_id)
+                if placeholder is not None:
+                    db.delete(placeholder)
+                    db.commit()
+                update(status="duplicate", document_id=existing_doc.id)
+                return
+
+            # Save raw text to PostgreSQL
+            doc_record = db.get(Document, job.document_id)
+            doc_record.content = text_content
+            doc_record.content_hash = content_hash
+            db.commit()
+
+            # Chunk text and create embeddings in a single embedding pass
+            update(status="chunking")
+            chunks, embeddings, cache = chunk_and_embed(
+                text_content,
+                db,
+                mode=job.chunking,
+                progress=lambda done, total: update(chunks_embedded=done, chunks_to_embed=total)
+            )
+
+            # Store in vector DB (ChromaDB)
+            update(
+                status="storing",
+                total_chunks=len(chunks),
+                embedding_cache_hits=cache["hits"],
+                embedding_cache_lookups=cache["lookups"],
+                window_cache_hits=cache.get("window_hits"),
+                window_cache_lookups=cache.get("window_lookups")
+            )
+            collection = get_user_collection(job.user_id)
+
+            # Generate unique IDs for each chunk
+            ids = [f"{doc_record.id}_{i}" for i in range(len(chunks))]
+
+            # Add to ChromaDB
+            collection.add(
+                ids=ids,
+                documents=chunks,
+                embeddings=embeddings,
+                metadatas=[{
+                    "filename": job.filename,
+                    "user_id": job.user_id,
+                    "document_id": doc_record.id
+                }] * len(chunks)
+            )
+
+            # Update the BM25 index for this document only
+            get_lexical_index().add_document(
+                job.user_id, doc_record.id, job.filename, ids, chunks
+            )
+
+            # Invalidates cached answers for this user
+            bump_corpus_version(job_db, job.user_id)
+            update(status="completed")
+            logger.info(
+                f"[JOB {job_id}] Completed: chunks={len(chunks)}, "
+                f"embedding_cache_hits={cache['hits']}/{cache['lookups']}"
+                + (
+                    f", window_cache_hits={cache['window_hits']}/{cache['window_lookups']}"
+                    if "window_hits" in cache else ""
+                )
+            )
+            completed = doc_record
+
+        except Exception as e:
+            logger.exception(f"[JOB {job_id}] Failed")
+            db.rollback()
+            job_db.rollback()
+            fail_job(job_db, job, str(e))
+
+        # Outside the job's try: the document is already usable, so an insight
+        # failure must never change the job's status
+        if completed is not None and INSIGHT_EAGER:
+            try:
+                precompute_insights(db, completed)
+            except Exception:
+                db.rollback()
+                logger.exception(f"[JOB {job_id}] Eager insights failed")
+
+    finally:
+        spool_path(job_id).unlink(missing_ok=True)
+        db.close()
+        job_db.close()
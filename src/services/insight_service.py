@@ -0,0 +1,194 @@
+import logging
+import os
+from typing import Literal
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.models.documents import Document
+from src.models.document_insights import DocumentInsight
+from src.utils.cache import SqliteCache
+from src.utils.context_builder import chunk_position, estimate_tokens
+from src.utils.map_reduce import MapReduceSummarizer
+from src.utils.models import models, LLM_MODEL
+from src.utils.streaming import content_text
+from src.utils.vector_store import get_user_collection, scope_filter
+
+logger = logging.getLogger("insights")
+logger.setLevel(logging.INFO)
+
+# Compute all insights right after ingestion instead of on first request
+INSIGHT_EAGER = os.getenv("INSIGHT_EAGER", "false").lower() in ("1", "true", "yes")
+
+INSIGHT_TYPES = ("summary", "topic", "sentiment")
+
+# Documents above this size are condensed with map-reduce summarization first
+INSIGHT_DIRECT_TOKEN_LIMIT = int(os.getenv("INSIGHT_DIRECT_TOKEN_LIMIT", "100000"))
+SUMMARY_GROUP_TOKENS = int(os.getenv("SUMMARY_GROUP_TOKENS", "8000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "8"))
+# Intermediate summaries, keyed by the hash of the text they summarize
+SUMMARY_CACHE_DB = os.getenv("SUMMARY_CACHE_DB", "./cache/summaries.sqlite")
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# Bump when the prompt or schema changes so stored results are recomputed
+INSIGHT_PROMPT_VERSION = "2"
+
+INSIGHT_PROMPT = """
+Analyze the following medical/physiotherapy document and return:
+
+1. summary: 5 clear, concise bullet points.
+2. topic: the most relevant topic. Choose or infer one:
+   - exercise therapy
+   - manual therapy
+   - electrotherapy
+   - pain management
+   - rehabilitation
+   with a brief explanation.
+3. sentiment: Positive, Neutral or Negative, with a short explanation.
+
+Document:
+{document}
+"""
+
+SECTION_PROMPT_VERSION = "1"
+
+SECTION_PROMPT = """
+Summarize this section of a medical/physiotherapy document in under 150 words.
+Keep diagnoses, treatments, measurements, dates and outcomes.
+
+Section:
+{text}
+"""
+
+_summary_cache = None
+
+def get_summary_cache() -> SqliteCache | None:
+    global _summary_cache
+    if _summary_cache is None and SUMMARY_CACHE_DB:
+        _summary_cache = SqliteCache(SUMMARY_CACHE_DB, SUMMARY_CACHE_MAX_BYTES)
+    return _summary_cache
+
+def summarize_section(text: str) -> str:
+    response = models.llm.invoke(SECTION_PROMPT.format(text=text))
+    return content_text(response.content).strip()
+
+def document_chunks(document: Document) -> list[str]:
+    # Reuse the chunks stored at ingestion, in document order
+    collection = get_user_collection(document.user_id)
+    stored = collection.get(
+        where=scope_filter(document.user_id, document.id),
+        include=["documents"]
+    )
+    ordered = sorted(
+        zip(stored["ids"], stored["documents"]),
+        key=lambda item: chunk_position(item[0]) or (item[0], 0)
+    )
+    chunks = [text for _, text in ordered]
+    if chunks:
+        return chunks
+
+    # Chunks ingested before document_id metadata existed can't be selected
+    size = SUMMARY_GROUP_TOKENS * 2
+    return [document.content[i:i + size] for i in range(0, len(document.content), size)]
+
+def insight_source(document: Document) -> str:
+    """
+    The text the insight prompt sees: the document itself when it fits,
+    otherwise a hierarchical summary of its chunks.
+    """
+    if estimate_tokens(document.content) <= INSIGHT_DIRECT_TOKEN_LIMIT:
+        return document.content
+
+    summarizer = MapReduceSummarizer(
+        summarize_section,
+        token_budget=SUMMARY_GROUP_TOKENS,
+        concurrency=SUMMARY_CONCURRENCY,
+        cache=get_summary_cache(),
+        cache_prefix=f"{LLM_MODEL}:{SECTION_PROMPT_VERSION}"
+    )
+    logger.info(f"[INSIGHT] Document {document.id} is too long for one prompt, summarizing chunks")
+    return summarizer.run(document_chunks(document))
+
+class DocumentInsights(BaseModel):
+    summary: list[str] = Field(description="5 bullet points summarizing the document")
+    topic: str = Field(description="Most relevant topic")
+    topic_explanation: str = Field(description="Why this topic fits")
+    sentiment: Literal["Positive", "Neutral", "Negative"]
+    sentiment_explanation: str = Field(description="Short justification of the sentiment")
+
+    def as_texts(self) -> dict[str, str]:
+        return {
+            "summary": "\n".join(f"- {point}" for point in self.summary),
+            "topic": f"{self.topic}: {self.topic_explanation}",
+            "sentiment": f"{self.sentiment}: {self.sentiment_explanation}"
+        }
+
+def find_insights(db: Session, document_id: int) -> dict[str, str]:
+    rows = db.query(DocumentInsight).filter(
+        DocumentInsight.document_id == document_id,
+        DocumentInsight.prompt_version == INSIGHT_PROMPT_VERSION,
+        DocumentInsight.model == LLM_MODEL
+    ).all()
+    return {row.insight_type: row.content for row in rows}
+
+def compute_insights(db: Session, document: Document) -> dict[str, str]:
+    """
+    One structured-output Gemini call for summary, topic and sentiment,
+    so the document text is sent once instead of once per insight.
+    """
+    extractor = models.llm.with_structured_output(DocumentInsights)
+    result = extractor.invoke(INSIGHT_PROMPT.format(document=insight_source(document)))
+    if result is None:
+        # The model's reply didn't parse into the schema; nothing is stored,
+        # so the next request tries again
+        logger.error(f"[INSIGHT] No structured insights returned for document {document.id}")
+        raise ValueError("Insight extraction returned no result")
+    texts = result.as_texts()
+
+    for insight_type, content in texts.items():
+        db.add(DocumentInsight(
+            document_id=document.id,
+            insight_type=insight_type,
+            prompt_version=INSIGHT_PROMPT_VERSION,
+            model=LLM_MODEL,
+            content=content
+        ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request stored the same insights first
+        db.rollback()
+
+    return texts
+
+def get_insights(db: Session, user_id: int, document_id: int) -> dict[str, str] | None:
+    """
+    Return all stored insights for the user's document, generating and
+    persisting them in one call on first use. None if the document doesn't exist.
+    """
+    document = db.query(Document).filter(
+        Document.user_id == user_id,
+        Document.id == document_id
+    ).first()
+    if document is None or not document.content:
+        return None
+
+    insights = find_insights(db, document_id)
+    if all(insight_type in insights for insight_type in INSIGHT_TYPES):
+        return insights
+
+    logger.info(f"[INSIGHT] Computing insights for document {document_id}")
+    return compute_insights(db, document)
+
+def get_insight(db: Session, user_id: int, document_id: int, insight_type: str) -> str | None:
+    insights = get_insights(db, user_id, document_id)
+    return insights[insight_type] if insights is not None else None
+
+def precompute_insights(db: Session, document: Document):
+    # Called from the ingestion job; failures only mean insights are computed lazily later
+    try:
+        if len(find_insights(db, document.id)) == len(INSIGHT_TYPES):
+            return
+        compute_insights(db, document)
+    except Exception:
+        db.rollback()
+        logger.exception(f"[INSIGHT] Eager insights failed for document {document.id}")
@@ -1,37 +1,276 @@
-from src.utils.vector_store import get_or_create_collection
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.vector_store import get_user_collection, scope_filter
+from src.utils.lexical_index import get_lexical_index
+from src.utils.reranker import RERANK_CANDIDATES, get_reranker
+from src.utils.semantic_cache import SemanticCache
+from src.utils.cache import LRUCache
+from src.utils.context_builder import build_context, format_context
+from src.utils.embedding_cache import normalize_text
 from src.utils.models import models
+from src.utils.streaming import content_text
+
+logger = logging.getLogger("rag")
+logger.setLevel(logging.INFO)
 
 gemini_model = models.llm
 embeddings= models.embeddings
 
-def run_rag_query(question: str, k: int = 5):
-    # Embed
-    query_embedding = models.embeddings.embed_query(question)
+# Per-stage concurrency limits for the async query path
+EMBED_CONCURRENCY = int(os.getenv("RAG_EMBED_CONCURRENCY", "16"))
+RETRIEVE_CONCURRENCY = int(os.getenv("RAG_RETRIEVE_CONCURRENCY", "8"))
+LLM_CONCURRENCY = int(os.getenv("RAG_LLM_CONCURRENCY", "32"))
+
+_embed_limit = asyncio.Semaphore(EMBED_CONCURRENCY)
+_retrieve_limit = asyncio.Semaphore(RETRIEVE_CONCURRENCY)
+_llm_limit = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# "vector": embeddings only, "lexical": BM25 only (no embedding call),
+# "hybrid": both, fused with reciprocal rank fusion
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical")
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "hybrid")
+# Candidates fetched from each retriever before fusion
+HYBRID_FETCH_K = int(os.getenv("RAG_HYBRID_FETCH_K", "20"))
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+
+# Answers keyed by question, scope, k, retrieval mode and the user's corpus version
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("RAG_ANSWER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+ANSWER_CACHE_TTL = float(os.getenv("RAG_ANSWER_CACHE_TTL", "3600"))
+
+answer_cache = LRUCache(max_bytes=ANSWER_CACHE_MAX_BYTES, ttl=ANSWER_CACHE_TTL)
+
+# Near-duplicate questions (cosine >= threshold) reuse an answer within the same scope.
+# Not used in lexical mode, which exists to avoid the embedding call.
+SEMANTIC_CACHE_ENABLED = os.getenv("RAG_SEMANTIC_CACHE", "true").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("RAG_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("RAG_SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+
+semantic_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=ANSWER_CACHE_TTL
+)
+
+# Chroma has no async client for local persistence, so queries run on a bounded pool
+_retrieve_executor = ThreadPoolExecutor(
+    max_workers=RETRIEVE_CONCURRENCY,
+    thread_name_prefix="rag-retrieve"
+)
+
+# Cross-encoder inference is CPU bound and already multi-threaded by torch,
+# so reranks run one at a time instead of competing for the cores
+_rerank_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-rerank")
 
-    # Retrieve
-    collection = get_or_create_collection("physio_docs")
-    results = collection.query(
+@contextmanager
+def timed(timings: dict | None, stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+def retrieve(
+    query_embedding: list[float],
+    k: int = 5,
+    *,
+    user_id: int,
+    document_id: int | None = None
+):
+    # Only search the requesting user's chunks (optionally one document)
+    collection = get_user_collection(user_id)
+    return collection.query(
         query_embeddings=[query_embedding],
         n_results=k,
+        where=scope_filter(user_id, document_id),
         include=["documents", "metadatas", "distances"]
     )
 
-    documents = results["documents"][0]
-    metadatas = results["metadatas"][0]
-    ids = results["ids"][0]
-    distances = results["distances"][0]
-
-    snippets = ""
-    
-    for i in range(len(documents)):
-        snippets += (
-            f"\n=== SNIPPET {i+1} ===\n"
-            f"ID: {ids[i]}\n"
-            f"FILE: {metadatas[i].get('filename', 'unknown')}\n"
-            f"CONTENT: {documents[i]}\n"
+def lexical_retrieve(
+    question: str,
+    k: int = 5,
+    *,
+    user_id: int,
+    document_id: int | None = None
+):
+    hits = get_lexical_index().search(question, k, user_id=user_id, document_id=document_id)
+
+    # Same shape as a Chroma query result; BM25 hits have no vector distance
+    return {
+        "ids": [[hit["id"] for hit in hits]],
+        "documents": [[hit["content"] for hit in hits]],
+        "metadatas": [[
+            {"filename": hit["filename"], "user_id": user_id, "document_id": hit["document_id"]}
+            for hit in hits
+        ]],
+        "distances": [[None] * len(hits)]
+    }
+
+def fuse_results(*results, k: int = 5):
+    """
+    Reciprocal rank fusion of several Chroma-shaped result sets.
+    Each list contributes 1 / (RRF_K + rank) per chunk, so chunks found
+    by both retrievers rise to the top without comparing raw scores.
+    """
+    scores = {}
+    chunks = {}
+    for result in results:
+        rows = zip(
+            result["ids"][0],
+            result["documents"][0],
+            result["metadatas"][0],
+            result["distances"][0]
         )
-        
-    final_prompt = f"""
+        for rank, (chunk_id, document, metadata, distance) in enumerate(rows, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+            # Keep the vector distance when either retriever has one
+            if chunk_id not in chunks or chunks[chunk_id][2] is None:
+                chunks[chunk_id] = (document, metadata, distance)
+
+    top = sorted(scores, key=scores.get, reverse=True)[:k]
+    return {
+        "ids": [top],
+        "documents": [[chunks[i][0] for i in top]],
+        "metadatas": [[chunks[i][1] for i in top]],
+        "distances": [[chunks[i][2] for i in top]]
+    }
+
+def resolve_mode(mode: str | None) -> str:
+    mode = mode or RETRIEVAL_MODE
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"retrieval must be one of {', '.join(RETRIEVAL_MODES)}")
+    return mode
+
+def answer_cache_key(
+    question: str,
+    k: int,
+    *,
+    user_id: int,
+    document_id: int | None,
+    mode: str,
+    corpus_version: int
+) -> str:
+    # Any upload or removal bumps corpus_version, so stale answers are never served
+    normalized = normalize_text(question).casefold()
+    payload = json.dumps([normalized, user_id, document_id, k, mode], separators=(",", ":"))
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{user_id}:{corpus_version}:{digest}"
+
+async def lookup_answer(
+    question: str,
+    k: int,
+    *,
+    user_id: int,
+    document_id: int | None,
+    mode: str | None,
+    corpus_version: int | None,
+    timings: dict
+):
+    """
+    Check the exact answer cache, then the semantic one.
+    Returns (cached entry or None, slot); pass the slot to store_answer
+    once a fresh answer has been generated.
+    """
+    if corpus_version is None:
+        return None, None
+
+    mode = resolve_mode(mode)
+    key = answer_cache_key(
+        question, k, user_id=user_id, document_id=document_id,
+        mode=mode, corpus_version=corpus_version
+    )
+    cached = answer_cache.get(key)
+    if cached is not None:
+        return cached, None
+
+    scope = vector = None
+    if SEMANTIC_CACHE_ENABLED and mode != "lexical":
+        # The query embedding is cached, so retrieval reuses it on a miss
+        with timed(timings, "semantic_cache_ms"):
+            async with _embed_limit:
+                vector = await models.embeddings.aembed_query(question)
+            scope = (user_id, document_id, k, mode, corpus_version)
+            cached = semantic_cache.get(scope, vector)
+        if cached is not None:
+            answer_cache.set(key, cached)
+            return cached, None
+
+    return None, (key, scope, vector)
+
+def store_answer(slot, entry: dict):
+    if slot is None:
+        return
+    key, scope, vector = slot
+    answer_cache.set(key, entry)
+    if vector is not None:
+        semantic_cache.set(scope, vector, entry)
+
+def candidate_count(k: int) -> int:
+    # Over-fetch when a reranker will pick the final k
+    return max(k, RERANK_CANDIDATES) if get_reranker() else k
+
+def search(
+    question: str,
+    k: int = 5,
+    *,
+    user_id: int,
+    document_id: int | None = None,
+    mode: str | None = None,
+    timings: dict | None = None
+):
+    mode = resolve_mode(mode)
+    scope = {"user_id": user_id, "document_id": document_id}
+    n = candidate_count(k)
+
+    if mode == "lexical":
+        with timed(timings, "lexical_ms"):
+            results = lexical_retrieve(question, n, **scope)
+    else:
+        with timed(timings, "embed_ms"):
+            query_embedding = models.embeddings.embed_query(question)
+
+        if mode == "vector":
+            with timed(timings, "vector_ms"):
+                results = retrieve(query_embedding, n, **scope)
+        else:
+            fetch_k = max(n, HYBRID_FETCH_K)
+            with timed(timings, "vector_ms"):
+                vector_results = retrieve(query_embedding, fetch_k, **scope)
+            with timed(timings, "lexical_ms"):
+                lexical_results = lexical_retrieve(question, fetch_k, **scope)
+            results = fuse_results(vector_results, lexical_results, k=n)
+
+    reranker = get_reranker()
+    if reranker:
+        with timed(timings, "rerank_ms"):
+            results = reranker.rerank(question, results, k)
+
+    return results
+
+def build_snippets(results) -> tuple[list[dict], str, list]:
+    """
+    Returns (context, snippets, distances): the merged snippet records, the
+    "=== SNIPPET n ===" text the prompt sees, and one distance per snippet.
+    """
+    context = build_context(results)
+    distances = [record["distance"] for record in context]
+    return context, format_context(context), distances
+
+def snippet_metadata(context: list[dict]) -> list[dict]:
+    return [
+        {key: value for key, value in record.items() if key != "content"}
+        for record in context
+    ]
+
+def build_prompt(question: str, snippets: str) -> str:
+    return f"""
 You are an intelligent Retrieval-Augmented Generation (RAG) assistant.
 
 Use the document SNIPPETS below to answer the user's question — even if the user
@@ -66,11 +305,196 @@ Answer:
 
 """
 
-    response = gemini_model.invoke(final_prompt)
+def run_rag_query(
+    question: str,
+    k: int = 5,
+    *,
+    user_id: int,
+    document_id: int | None = None,
+    mode: str | None = None
+):
+    timings = {}
+
+    # Embed + Retrieve (+ Rerank)
+    results = search(
+        question, k, user_id=user_id, document_id=document_id, mode=mode, timings=timings
+    )
+    context, snippets, distances = build_snippets(results)
+
+    # Generate
+    with timed(timings, "generate_ms"):
+        response = gemini_model.invoke(build_prompt(question, snippets))
     answer = response.content.strip()
+    logger.info(f"[RAG] timings={timings}")
 
     return {
         "answer": answer,
         "snippets": snippets,
-        "distances": distances
-    }
\ No newline at end of file
+        "distances": distances,
+        "context": context,
+        "timings": timings
+    }
+
+async def aretrieve(
+    question: str,
+    k: int = 5,
+    *,
+    user_id: int,
+    document_id: int | None = None,
+    mode: str | None = None,
+    timings: dict | None = None
+):
+    mode = resolve_mode(mode)
+    scope = {"user_id": user_id, "document_id": document_id}
+    loop = asyncio.get_running_loop()
+    n = candidate_count(k)
+
+    async def vector(fetch_k: int):
+        # Embed
+        with timed(timings, "embed_ms"):
+            async with _embed_limit:
+                query_embedding = await models.embeddings.aembed_query(question)
+
+        # Retrieve
+        with timed(timings, "vector_ms"):
+            async with _retrieve_limit:
+                return await loop.run_in_executor(
+                    _retrieve_executor, partial(retrieve, query_embedding, fetch_k, **scope)
+                )
+
+    async def lexical(fetch_k: int):
+        with timed(timings, "lexical_ms"):
+            async with _retrieve_limit:
+                return await loop.run_in_executor(
+                    _retrieve_executor, partial(lexical_retrieve, question, fetch_k, **scope)
+                )
+
+    if mode == "lexical":
+        results = await lexical(n)
+    elif mode == "vector":
+        results = await vector(n)
+    else:
+        # BM25 runs while the query embedding is in flight
+        fetch_k = max(n, HYBRID_FETCH_K)
+        vector_results, lexical_results = await asyncio.gather(vector(fetch_k), lexical(fetch_k))
+        results = fuse_results(vector_results, lexical_results, k=n)
+
+    reranker = get_reranker()
+    if reranker:
+        with timed(timings, "rerank_ms"):
+            results = await loop.run_in_executor(
+                _rerank_executor, reranker.rerank, question, results, k
+            )
+
+    return results
+
+async def arun_rag_query(
+    question: str,
+    k: int = 5,
+    *,
+    user_id: int,
+    document_id: int | None = None,
+    mode: str | None = None,
+    corpus_version: int | None = None
+):
+    """
+    Async variant of run_rag_query that never blocks the event loop.
+    Embedding and generation use the async Gemini clients, Chroma runs
+    on a bounded thread pool, and each stage has its own concurrency limit.
+    When corpus_version is given, answers are cached until the user's
+    documents change.
+
+    snippets is the snippet text sent to Gemini, distances has one entry
+    per snippet, and context holds the snippet records themselves.
+    """
+    timings = {}
+    cached, slot = await lookup_answer(
+        question, k, user_id=user_id, document_id=document_id,
+        mode=mode, corpus_version=corpus_version, timings=timings
+    )
+    if cached is not None:
+        return {**cached, "timings": timings, "cached": True}
+
+    results = await aretrieve(
+        question, k, user_id=user_id, document_id=document_id, mode=mode, timings=timings
+    )
+    context, snippets, distances = build_snippets(results)
+
+    # Generate
+    with timed(timings, "generate_ms"):
+        async with _llm_limit:
+            response = await gemini_model.ainvoke(build_prompt(question, snippets))
+    answer = response.content.strip()
+    logger.info(f"[RAG] timings={timings}")
+
+    store_answer(slot, {
+        "answer": answer,
+        "snippets": snippets,
+        "distances": distances,
+        "context": context
+    })
+
+    return {
+        "answer": answer,
+        "snippets": snippets,
+        "distances": distances,
+        "context": context,
+        "timings": timings,
+        "cached": False
+    }
+
+async def astream_rag_query(
+    question: str,
+    k: int = 5,
+    *,
+    user_id: int,
+    document_id: int | None = None,
+    mode: str | None = None,
+    corpus_version: int | None = None
+):
+    """
+    Streaming variant of arun_rag_query.
+    Yields ("snippets", metadata) once retrieval finishes, then ("token", text)
+    for every chunk Gemini produces, then ("timings", per-stage ms) and
+    finally ("done", answer). A cached answer is sent as a single token.
+    """
+    timings = {}
+    cached, slot = await lookup_answer(
+        question, k, user_id=user_id, document_id=document_id,
+        mode=mode, corpus_version=corpus_version, timings=timings
+    )
+    if cached is not None:
+        yield "snippets", snippet_metadata(cached["context"])
+        yield "token", cached["answer"]
+        yield "timings", timings
+        yield "done", cached["answer"]
+        return
+
+    results = await aretrieve(
+        question, k, user_id=user_id, document_id=document_id, mode=mode, timings=timings
+    )
+    context, snippets, distances = build_snippets(results)
+
+    yield "snippets", snippet_metadata(context)
+
+    # Generate
+    answer = ""
+    with timed(timings, "generate_ms"):
+        async with _llm_limit:
+            async for chunk in gemini_model.astream(build_prompt(question, snippets)):
+                text = content_text(chunk.content)
+                if text:
+                    answer += text
+                    yield "token", text
+    logger.info(f"[RAG] timings={timings}")
+    answer = answer.strip()
+
+    store_answer(slot, {
+        "answer": answer,
+        "snippets": snippets,
+        "distances": distances,
+        "context": context
+    })
+
+    yield "timings", timings
+    yield "done", answer
@@ -1,4 +1,4 @@
-from src.agents.agent_state import AgentState
+from src.utils.session_store import SessionStore, session_store
 
-def get_agent_state():
-    return AgentState()
\ No newline at end of file
+def get_session_store() -> SessionStore:
+    return session_store
\ No newline at end of file
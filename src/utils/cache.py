@@ -0,0 +1,207 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Shared cache primitives.
+# LRUCache is an in-memory, byte-bounded LRU with optional TTL.
+# SqliteCache is a persistent tier with the same interface that survives restarts.
+# Values must be JSON-serialisable so both tiers can hold the same data.
+
+def json_size(value) -> int:
+    return len(json.dumps(value, separators=(",", ":")))
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class LRUCache:
+    def __init__(self, max_bytes: int, ttl: float | None = None, size_of=json_size):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_of = size_of
+        self.stats = CacheStats()
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return default
+
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                self.stats.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = self.size_of(value) + len(str(key))
+        if size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self) -> dict:
+        return {
+            **self.stats.as_dict(),
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
+
+class SqliteCache:
+    def __init__(self, path: str, max_bytes: int, ttl: float | None = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)"
+        )
+        self._conn.commit()
+        self._bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()[0]
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return default
+
+            value, size, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._bytes -= size
+                self.stats.misses += 1
+                return default
+
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.stats.hits += 1
+            return json.loads(value)
+
+    def set(self, key, value):
+        payload = json.dumps(value, separators=(",", ":"))
+        size = len(payload) + len(key)
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if old:
+                self._bytes -= old[0]
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, size, expires_at, now)
+            )
+            self._bytes += size
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._bytes -= row[0]
+
+    def _evict(self):
+        # Least recently accessed entries go first
+        while self._bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM cache ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._bytes = 0
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._bytes -= size
+                self.stats.evictions += 1
+                if self._bytes <= self.max_bytes:
+                    break
+
+    def info(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {
+            **self.stats.as_dict(),
+            "entries": entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,146 @@
+import os
+import re
+
+# Prompt context assembly: retrieved chunks become snippet records that are
+# merged, de-duplicated and trimmed to a token budget before prompting Gemini.
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "3000"))
+# Word-set Jaccard similarity above which a lower-ranked chunk is dropped
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("RAG_CONTEXT_DEDUP_THRESHOLD", "0.85"))
+# Longest chunk overlap looked for when joining neighbours (splitter overlap is 100)
+MAX_OVERLAP_CHARS = 400
+MIN_OVERLAP_CHARS = 20
+# A truncated snippet shorter than this isn't worth including
+MIN_SNIPPET_TOKENS = 50
+
+_words = re.compile(r"\w+")
+
+def estimate_tokens(text: str) -> int:
+    # Gemini averages roughly four characters per token on English prose
+    return (len(text) + 3) // 4
+
+def chunk_position(chunk_id: str) -> tuple[str, int] | None:
+    # Chunks are stored as "<document_id>_<index>"
+    document, _, index = chunk_id.rpartition("_")
+    return (document, int(index)) if document and index.isdigit() else None
+
+def overlap_length(left: str, right: str) -> int:
+    limit = min(len(left), len(right), MAX_OVERLAP_CHARS)
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def to_records(results) -> list[dict]:
+    ids = results["ids"][0]
+    scores = results.get("scores", [[None] * len(ids)])[0]
+
+    return [
+        {
+            "ids": [chunk_id],
+            "document_id": metadata.get("document_id"),
+            "filename": metadata.get("filename", "unknown"),
+            "content": document,
+            "distance": distance,
+            "rerank_score": score,
+            "rank": rank
+        }
+        for rank, (chunk_id, document, metadata, distance, score) in enumerate(zip(
+            ids,
+            results["documents"][0],
+            results["metadatas"][0],
+            results["distances"][0],
+            scores
+        ))
+    ]
+
+def drop_near_duplicates(records: list[dict]) -> list[dict]:
+    kept = []
+    kept_words = []
+    for record in records:
+        words = set(_words.findall(record["content"].casefold()))
+        if any(jaccard(words, other) >= CONTEXT_DEDUP_THRESHOLD for other in kept_words):
+            continue
+        kept.append(record)
+        kept_words.append(words)
+    return kept
+
+def merge_adjacent(records: list[dict]) -> list[dict]:
+    # Consecutive chunks of one document become a single record without the repeated overlap
+    positioned = sorted(
+        (r for r in records if chunk_position(r["ids"][0])),
+        key=lambda r: chunk_position(r["ids"][0])
+    )
+    merged = [r for r in records if not chunk_position(r["ids"][0])]
+
+    current = previous = None
+    for record in positioned:
+        document, index = chunk_position(record["ids"][0])
+
+        if current is not None and previous == (document, index - 1):
+            overlap = overlap_length(current["content"], record["content"])
+            current["content"] += record["content"][overlap:] if overlap else "\n" + record["content"]
+            current["ids"].append(record["ids"][0])
+            current["rank"] = min(current["rank"], record["rank"])
+            current["distance"] = min(
+                (d for d in (current["distance"], record["distance"]) if d is not None),
+                default=None
+            )
+            current["rerank_score"] = max(
+                (s for s in (current["rerank_score"], record["rerank_score"]) if s is not None),
+                default=None
+            )
+        else:
+            current = dict(record, ids=list(record["ids"]))
+            merged.append(current)
+
+        previous = (document, index)
+
+    return merged
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    cut = text[:tokens * 4 - 2]
+    # Prefer ending on a word boundary
+    space = cut.rfind(" ")
+    return (cut[:space] if space > len(cut) // 2 else cut).rstrip() + " …"
+
+def build_context(results, token_budget: int = CONTEXT_TOKEN_BUDGET) -> list[dict]:
+    """
+    Turn a Chroma-shaped result set into snippet records for the prompt:
+    near-duplicate chunks are dropped, neighbouring chunks of the same
+    document are merged, and records are added best-ranked first until the
+    token budget is spent (the last one truncated if worthwhile).
+    """
+    records = merge_adjacent(drop_near_duplicates(to_records(results)))
+    records.sort(key=lambda r: r["rank"])
+
+    context = []
+    remaining = token_budget
+    for record in records:
+        tokens = estimate_tokens(record["content"])
+        if tokens > remaining:
+            if remaining < MIN_SNIPPET_TOKENS:
+                break
+            record["content"] = truncate_to_tokens(record["content"], remaining)
+            tokens = estimate_tokens(record["content"])
+
+        record.pop("rank")
+        record["tokens"] = tokens
+        context.append(record)
+        remaining -= tokens
+
+    return context
+
+def format_context(records: list[dict]) -> str:
+    return "\n".join(
+        f"=== SNIPPET {i} ===\n"
+        f"ID: {', '.join(record['ids'])}\n"
+        f"FILE: {record['filename']}\n"
+        f"CONTENT: {record['content']}\n"
+        for i, record in enumerate(records, start=1)
+    )
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import re
+import unicodedata
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from src.utils.cache import LRUCache, SqliteCache
+
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+# Optional on-disk tier, e.g. ./cache/embeddings.sqlite3
+EMBEDDING_CACHE_DB = os.getenv("EMBEDDING_CACHE_DB")
+EMBEDDING_CACHE_DB_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_DB_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+_whitespace = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text)
+    return _whitespace.sub(" ", text).strip()
+
+def vector_size(vector: np.ndarray) -> int:
+    return vector.nbytes
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves repeated texts from a byte-bounded LRU
+    (and optionally a SQLite tier) before calling the remote model.
+    Query and document embeddings are cached separately because Gemini
+    embeds them with different task types.
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str):
+        self.inner = inner
+        self.model_name = model_name
+        self.memory = LRUCache(
+            max_bytes=EMBEDDING_CACHE_MAX_BYTES,
+            ttl=EMBEDDING_CACHE_TTL,
+            size_of=vector_size
+        )
+        self.disk = (
+            SqliteCache(EMBEDDING_CACHE_DB, EMBEDDING_CACHE_DB_MAX_BYTES, ttl=EMBEDDING_CACHE_TTL)
+            if EMBEDDING_CACHE_DB else None
+        )
+
+    def _key(self, kind: str, text: str) -> str:
+        text = normalize_text(text)
+        # Questions that only differ in case or spacing share an embedding
+        if kind == "query":
+            text = text.casefold()
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    def _lookup(self, key: str):
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector.tolist()
+
+        if self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self.memory.set(key, np.asarray(vector, dtype=np.float32))
+        return vector
+
+    def _store(self, key: str, vector):
+        # float32 arrays: 4 bytes per dimension, so max_bytes bounds real memory
+        self.memory.set(key, np.asarray(vector, dtype=np.float32))
+        if self.disk is not None:
+            self.disk.set(key, vector)
+
+    def _split(self, texts: list[str]):
+        keys = [self._key("document", t) for t in texts]
+        vectors = [self._lookup(k) for k in keys]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        return keys, vectors, missing
+
+    # QUERY
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key("query", text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key("query", text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = await self.inner.aembed_query(text)
+            self._store(key, vector)
+        return vector
+
+    # DOCUMENTS
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents_with_hits(texts)[0]
+
+    def embed_documents_with_hits(self, texts: list[str]) -> tuple[list[list[float]], int]:
+        # Also returns how many texts were served from the cache
+        keys, vectors, missing = self._split(texts)
+        if missing:
+            fresh = self.inner.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+                self._store(keys[i], vector)
+        return vectors, len(texts) - len(missing)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, vectors, missing = self._split(texts)
+        if missing:
+            fresh = await self.inner.aembed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+                self._store(keys[i], vector)
+        return vectors
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.info(),
+            "disk": self.disk.info() if self.disk is not None else None
+        }
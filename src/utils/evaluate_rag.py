@@ -7,31 +7,25 @@ if os.getenv("ENV") == "production":
 from datasets import Dataset
 from src.services.rag_service import run_rag_query
 
-def build_ragas_dataset(data):
+def build_ragas_dataset(data, user_id: int):
     questions = []
     answers = []
     contexts = []
     ground_truths = []
 
     for item in data:
-        result = run_rag_query(item["question"])
+        result = run_rag_query(item["question"], user_id=user_id)
 
         questions.append(item["question"])
         answers.append(result["answer"])
         ground_truths.append(item["ground_truth"])
 
         # contexts must be a list of strings
-        # contexts.append(
-        #     [snippet.strip() for snippet in result["snippets"].split("=== SNIPPET") if snippet.strip()]
-        # )
-
-        clean_contexts = []
-
-        for snippet in result["snippets"].split("=== SNIPPET"):
-            if "CONTENT:" in snippet:
-                content = snippet.split("CONTENT:", 1)[1].strip()
-                if content:
-                    clean_contexts.append(content)
+        clean_contexts = [
+            record["content"].strip()
+            for record in result["context"]
+            if record["content"].strip()
+        ]
 
         # Safety fallback
         if not clean_contexts:
@@ -0,0 +1,209 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+
+# Local BM25 index kept next to Chroma so exact terms (drug names, ICD codes,
+# abbreviations, numbers) can be matched without an embedding call
+LEXICAL_INDEX_DB = os.getenv("LEXICAL_INDEX_DB", "./cache/lexical.sqlite")
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Keeps dotted/hyphenated codes such as "m54.5" or "s83-511" as one token
+TOKEN = re.compile(r"\w+(?:[.\-/]\w+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how i if in into is it its
+of on or so that the their then there these this to was were what when where
+which who why will with you your
+""".split())
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN.findall(text.casefold()) if t not in STOPWORDS]
+
+class LexicalIndex:
+    """
+    BM25 inverted index in SQLite. Each document's chunks are added or
+    replaced as a unit, so uploads update the index incrementally instead
+    of rebuilding it. Every posting carries user_id and document_id so
+    searches are scoped the same way as vector retrieval.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Serializes writes on the shared connection; searches use per-thread
+        # read-only connections, which WAL lets run alongside a writer
+        self._lock = threading.Lock()
+        self._readers = threading.local()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk_id TEXT PRIMARY KEY, user_id INTEGER NOT NULL, document_id INTEGER NOT NULL, "
+            "filename TEXT, content TEXT NOT NULL, length INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, chunk_id TEXT NOT NULL, user_id INTEGER NOT NULL, "
+            "document_id INTEGER NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term, chunk_id)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_user ON chunks (user_id, document_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks (document_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_user_term ON postings (user_id, term)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_document ON postings (document_id)")
+        self._conn.commit()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            # Autocommit mode, so each search opens its own snapshot explicitly
+            conn = sqlite3.connect(
+                f"file:{Path(self.path).resolve()}?mode=ro", uri=True, isolation_level=None
+            )
+            self._readers.conn = conn
+        return conn
+
+    def _delete_document(self, document_id: int):
+        self._conn.execute("DELETE FROM postings WHERE document_id = ?", (document_id,))
+        self._conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+
+    def add_document(
+        self,
+        user_id: int,
+        document_id: int,
+        filename: str,
+        ids: list[str],
+        chunks: list[str]
+    ):
+        chunk_rows = []
+        posting_rows = []
+        for chunk_id, chunk in zip(ids, chunks):
+            terms = Counter(tokenize(chunk))
+            chunk_rows.append((chunk_id, user_id, document_id, filename, chunk, sum(terms.values())))
+            posting_rows.extend(
+                (term, chunk_id, user_id, document_id, tf) for term, tf in terms.items()
+            )
+
+        with self._lock:
+            # Re-ingesting a document replaces its previous postings
+            self._delete_document(document_id)
+            self._conn.executemany(
+                "INSERT INTO chunks (chunk_id, user_id, document_id, filename, content, length) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                chunk_rows
+            )
+            self._conn.executemany(
+                "INSERT INTO postings (term, chunk_id, user_id, document_id, tf) "
+                "VALUES (?, ?, ?, ?, ?)",
+                posting_rows
+            )
+            self._conn.commit()
+
+    def remove_document(self, document_id: int):
+        with self._lock:
+            self._delete_document(document_id)
+            self._conn.commit()
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        *,
+        user_id: int,
+        document_id: int | None = None
+    ) -> list[dict]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        def scope(alias: str = "") -> str:
+            clause = f"{alias}user_id = ?"
+            if document_id is not None:
+                clause += f" AND {alias}document_id = ?"
+            return clause
+
+        params = [user_id] if document_id is None else [user_id, document_id]
+        placeholders = ",".join("?" * len(terms))
+
+        conn = self._reader()
+        # One read transaction, so the counts and postings come from the same snapshot
+        conn.execute("BEGIN")
+        try:
+            total, avg_length = conn.execute(
+                f"SELECT COUNT(*), AVG(length) FROM chunks WHERE {scope()}", params
+            ).fetchone()
+            if not total:
+                return []
+
+            df = dict(conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE {scope()} AND term IN ({placeholders}) "
+                "GROUP BY term",
+                params + terms
+            ).fetchall())
+
+            rows = conn.execute(
+                f"SELECT p.chunk_id, p.term, p.tf, c.length FROM postings p "
+                f"JOIN chunks c ON c.chunk_id = p.chunk_id "
+                f"WHERE {scope('p.')} AND p.term IN ({placeholders})",
+                params + terms
+            ).fetchall()
+
+            scores = defaultdict(float)
+            avg_length = avg_length or 1.0
+            for chunk_id, term, tf, length in rows:
+                idf = math.log(1 + (total - df[term] + 0.5) / (df[term] + 0.5))
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[chunk_id] += idf * tf * (BM25_K1 + 1) / norm
+
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            if not top:
+                return []
+
+            details = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    f"SELECT chunk_id, document_id, filename, content FROM chunks "
+                    f"WHERE chunk_id IN ({','.join('?' * len(top))})",
+                    [chunk_id for chunk_id, _ in top]
+                ).fetchall()
+            }
+        finally:
+            conn.execute("ROLLBACK")
+
+        return [
+            {
+                "id": chunk_id,
+                "document_id": details[chunk_id][0],
+                "filename": details[chunk_id][1],
+                "content": details[chunk_id][2],
+                "score": score
+            }
+            for chunk_id, score in top
+        ]
+
+    def document_ids(self) -> set[int]:
+        conn = self._reader()
+        return {row[0] for row in conn.execute("SELECT DISTINCT document_id FROM chunks")}
+
+    def info(self) -> dict:
+        conn = self._reader()
+        chunks = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        postings = conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {"chunks": chunks, "postings": postings}
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_lexical_index() -> LexicalIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LexicalIndex(LEXICAL_INDEX_DB)
+    return _index
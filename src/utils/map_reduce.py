@@ -0,0 +1,94 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from src.utils.context_builder import estimate_tokens
+
+logger = logging.getLogger("insights")
+
+def group_texts(texts: list[str], token_budget: int) -> list[str]:
+    # Pack consecutive texts into groups that each fit the budget. Packing is
+    # sequential, so appending text only changes the trailing groups.
+    groups = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > token_budget:
+            groups.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append("\n\n".join(current))
+    return groups
+
+class MapReduceSummarizer:
+    """
+    Hierarchical summarization for text that doesn't fit one prompt.
+    Chunks are packed into groups of at most token_budget tokens and
+    summarized in parallel (map); the summaries are packed and summarized
+    again until they fit the budget together (reduce).
+
+    Every intermediate summary is cached by the hash of its input, so
+    re-summarizing a document that only grew recomputes just the groups
+    whose text changed.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str], str],
+        token_budget: int,
+        concurrency: int = 8,
+        cache=None,
+        cache_prefix: str = ""
+    ):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.concurrency = concurrency
+        self.cache = cache
+        self.cache_prefix = cache_prefix
+
+    def _key(self, text: str) -> str:
+        return f"{self.cache_prefix}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _summarize_cached(self, text: str) -> str:
+        summary = self.summarize(text)
+        if self.cache is not None:
+            self.cache.set(self._key(text), summary)
+        return summary
+
+    def _map(self, groups: list[str]) -> tuple[list[str], int]:
+        summaries = [
+            self.cache.get(self._key(group)) if self.cache is not None else None
+            for group in groups
+        ]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(missing))) as pool:
+                for i, summary in zip(missing, pool.map(self._summarize_cached, [groups[i] for i in missing])):
+                    summaries[i] = summary
+
+        return summaries, len(groups) - len(missing)
+
+    def run(self, chunks: list[str]) -> str:
+        texts = chunks
+        level = 0
+        while True:
+            groups = group_texts(texts, self.token_budget)
+            # Reducing can't shrink a level whose summaries each fill a group
+            if level > 0 and len(groups) >= len(texts):
+                return "\n\n".join(texts)
+
+            summaries, cached = self._map(groups)
+            logger.info(
+                f"[SUMMARY] Level {level}: {len(groups)} groups, {cached} from cache"
+            )
+
+            combined = "\n\n".join(summaries)
+            if len(summaries) == 1 or estimate_tokens(combined) <= self.token_budget:
+                return combined
+
+            texts = summaries
+            level += 1
@@ -1,6 +1,155 @@
 import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
+from src.utils.embedding_cache import CachedEmbeddings
+
+logger = logging.getLogger("models")
+logger.setLevel(logging.INFO)
+
+EMBEDDING_MODEL = "models/embedding-001"
+LLM_MODEL = "gemini-2.5-flash"
+
+# Embedding executor settings
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))  # Gemini batch limit
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+EMBED_REQUESTS_PER_MINUTE = float(os.getenv("EMBED_REQUESTS_PER_MINUTE", "150"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+# Interactive query embeddings get their own budget so a large upload can't
+# throttle /rag/ask; 0 disables the limit for queries
+EMBED_QUERY_REQUESTS_PER_MINUTE = float(os.getenv("EMBED_QUERY_REQUESTS_PER_MINUTE", "600"))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a request may be sent.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: int | None = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, int(self.rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        # Take a token and return how long the caller must wait for it
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if status in (429, 500, 503):
+        return True
+    message = str(error)
+    return any(marker in message for marker in ("429", "RESOURCE_EXHAUSTED", "503", "UNAVAILABLE"))
+
+def backoff_delay(attempt: int) -> float:
+    return min(60.0, 2 ** attempt) + random.uniform(0, 1)
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embedding executor: splits documents into batches, embeds a bounded
+    number of batches concurrently under a token-bucket rate limit, retries
+    rate-limited calls with exponential backoff and returns vectors in
+    input order. Query embeddings draw from a separate bucket, so ingestion
+    never queues interactive questions. Wraps any LangChain Embeddings, so
+    a fake client can stand in for Gemini.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_concurrency: int = EMBED_MAX_CONCURRENCY,
+        requests_per_minute: float = EMBED_REQUESTS_PER_MINUTE,
+        max_retries: int = EMBED_MAX_RETRIES,
+        query_requests_per_minute: float = EMBED_QUERY_REQUESTS_PER_MINUTE
+    ):
+        self.inner = inner
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(requests_per_minute)
+        self.query_bucket = TokenBucket(query_requests_per_minute) if query_requests_per_minute else None
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embed")
+        self._async_limit = asyncio.Semaphore(max_concurrency)
+
+    def _batches(self, texts: list[str]) -> list[list[str]]:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def _call(self, fn, *args, bucket=None):
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                return fn(*args)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"[EMBED] Rate limited, retrying in {delay:.1f}s ({e})")
+                time.sleep(delay)
+
+    async def _acall(self, fn, *args, bucket=None):
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                await bucket.aacquire()
+            try:
+                return await fn(*args)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"[EMBED] Rate limited, retrying in {delay:.1f}s ({e})")
+                await asyncio.sleep(delay)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        batches = self._batches(texts)
+        if len(batches) <= 1:
+            return self._call(self.inner.embed_documents, texts, bucket=self.bucket) if texts else []
+
+        # map() keeps results in submission order
+        results = self._pool.map(
+            lambda batch: self._call(self.inner.embed_documents, batch, bucket=self.bucket),
+            batches
+        )
+        return [vector for batch in results for vector in batch]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        async def run(batch):
+            async with self._async_limit:
+                return await self._acall(self.inner.aembed_documents, batch, bucket=self.bucket)
+
+        results = await asyncio.gather(*(run(batch) for batch in self._batches(texts)))
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._call(self.inner.embed_query, text, bucket=self.query_bucket)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self._acall(self.inner.aembed_query, text, bucket=self.query_bucket)
 
 class Models:
     _embeddings = None
@@ -9,9 +158,14 @@ class Models:
     @property
     def embeddings(self):
         if self._embeddings is None:
-            self._embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/embedding-001",
-                google_api_key=os.getenv("GOOGLE_API_KEY")
+            self._embeddings = CachedEmbeddings(
+                BatchedEmbeddings(
+                    GoogleGenerativeAIEmbeddings(
+                        model=EMBEDDING_MODEL,
+                        google_api_key=os.getenv("GOOGLE_API_KEY")
+                    )
+                ),
+                model_name=EMBEDDING_MODEL
             )
         return self._embeddings
 
@@ -19,7 +173,7 @@ class Models:
     def llm(self):
         if self._llm is None:
             self._llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
+                model=LLM_MODEL,
                 google_api_key=os.getenv("GOOGLE_API_KEY")
             )
         return self._llm
@@ -0,0 +1,202 @@
+import os
+import time
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import fitz
+import pdfplumber
+from src.utils.text_confidence import analyze_text_confidence
+
+# Page-sharded PDF analysis.
+# Kept free of app imports so spawned worker processes start quickly.
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+# Smaller documents are analysed in-process; the pool only pays off on long PDFs
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+
+# "pymupdf": PyMuPDF for every page, pdfplumber tables only where PyMuPDF sees ruling lines
+# "pdfplumber": pdfplumber for every page
+PDF_ENGINE = os.getenv("PDF_ENGINE", "pymupdf")
+# Minimum horizontal + vertical ruling segments before a page is treated as tabular
+PDF_TABLE_MIN_LINES = int(os.getenv("PDF_TABLE_MIN_LINES", "6"))
+
+_pool = None
+
+# Pages handled and seconds spent per engine, for throughput metrics
+_engine_pages = Counter()
+_engine_seconds = Counter()
+_stats_lock = threading.Lock()
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the API process runs threads, which don't mix with fork
+        _pool = ProcessPoolExecutor(
+            max_workers=PDF_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+def shutdown_pdf_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def engine_stats() -> dict:
+    with _stats_lock:
+        return {
+            engine: {
+                "pages": pages,
+                "seconds": round(_engine_seconds[engine], 3),
+                "pages_per_second": round(pages / _engine_seconds[engine], 2) if _engine_seconds[engine] else None
+            }
+            for engine, pages in _engine_pages.items()
+        }
+
+def record_engine_stats(pages: list[dict]):
+    with _stats_lock:
+        for page in pages:
+            _engine_pages[page["engine"]] += 1
+            _engine_seconds[page["engine"]] += page["seconds"]
+
+# ---------- pdfplumber ----------
+def analyze_page(page, page_no: int) -> dict:
+    started = time.perf_counter()
+    native_text = page.extract_text() or ""
+
+    return {
+        "page_no": page_no,
+        "engine": "pdfplumber",
+        "native_text": native_text,
+        "confidence": analyze_text_confidence(native_text),
+        "image_count": len(page.images),
+        "tables": page.extract_tables(),
+        "seconds": time.perf_counter() - started
+    }
+
+# ---------- PyMuPDF fast path ----------
+def looks_tabular(page) -> bool:
+    # Ruled tables are drawn as runs of horizontal and vertical segments
+    horizontal = vertical = 0
+    for drawing in page.get_drawings():
+        for item in drawing["items"]:
+            if item[0] == "l":
+                p1, p2 = item[1], item[2]
+                if abs(p1.y - p2.y) < 1:
+                    horizontal += 1
+                elif abs(p1.x - p2.x) < 1:
+                    vertical += 1
+            elif item[0] == "re":
+                rect = item[1]
+                if rect.height < 2:
+                    horizontal += 1
+                elif rect.width < 2:
+                    vertical += 1
+                else:
+                    horizontal += 2
+                    vertical += 2
+
+    return horizontal >= 2 and vertical >= 2 and horizontal + vertical >= PDF_TABLE_MIN_LINES
+
+def analyze_page_fitz(page, page_no: int, plumber_page) -> dict:
+    started = time.perf_counter()
+    native_text = page.get_text("text") or ""
+
+    tables = []
+    engine = "pymupdf"
+    if looks_tabular(page):
+        tables = plumber_page().extract_tables()
+        engine = "pymupdf+pdfplumber"
+
+    return {
+        "page_no": page_no,
+        "engine": engine,
+        "native_text": native_text,
+        "confidence": analyze_text_confidence(native_text),
+        "image_count": len(page.get_images(full=False)),
+        "tables": tables,
+        "seconds": time.perf_counter() - started
+    }
+
+def analyze_page_range(
+    path: str,
+    first: int,
+    last: int,
+    engine: str = PDF_ENGINE,
+    on_page=None
+) -> list[dict]:
+    # Runs in a worker: open the PDF file once for the whole shard
+    def done(page):
+        if on_page:
+            on_page(page["page_no"])
+        return page
+
+    if engine == "pdfplumber":
+        with pdfplumber.open(path) as pdf:
+            return [done(analyze_page(pdf.pages[n - 1], n)) for n in range(first, last + 1)]
+
+    plumber = None
+
+    def plumber_page(n):
+        # pdfplumber is only opened if a page looks tabular
+        nonlocal plumber
+        if plumber is None:
+            plumber = pdfplumber.open(path)
+        return plumber.pages[n - 1]
+
+    try:
+        with fitz.open(path) as doc:
+            return [
+                done(analyze_page_fitz(doc[n - 1], n, lambda n=n: plumber_page(n)))
+                for n in range(first, last + 1)
+            ]
+    finally:
+        if plumber is not None:
+            plumber.close()
+
+def count_pages(path: str) -> int:
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+def page_ranges(total_pages: int, shards: int) -> list[tuple[int, int]]:
+    size, extra = divmod(total_pages, shards)
+    ranges = []
+    first = 1
+    for i in range(shards):
+        last = first + size - 1 + (1 if i < extra else 0)
+        if last >= first:
+            ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+def analyze_pdf(path: str, on_page=None) -> list[dict]:
+    """
+    Analyse every page of a PDF, fanning contiguous page ranges out across
+    the process pool for long documents. Results are returned in page order.
+    """
+    total_pages = count_pages(path)
+
+    if PDF_EXTRACT_WORKERS <= 1 or total_pages < PDF_PARALLEL_MIN_PAGES:
+        results = analyze_page_range(
+            path, 1, total_pages, PDF_ENGINE,
+            on_page=(lambda page_no: on_page(page_no, total_pages)) if on_page else None
+        )
+    else:
+        pool = get_pdf_pool()
+        futures = [
+            pool.submit(analyze_page_range, path, first, last, PDF_ENGINE)
+            for first, last in page_ranges(total_pages, PDF_EXTRACT_WORKERS)
+        ]
+
+        results = []
+        for future in as_completed(futures):
+            results.extend(future.result())
+            if on_page:
+                on_page(len(results), total_pages)
+
+        results.sort(key=lambda page: page["page_no"])
+
+    record_engine_stats(results)
+    return results
@@ -0,0 +1,67 @@
+import os
+import threading
+
+# Optional cross-encoder stage: retrieval over-fetches candidates and a local
+# model keeps only the best few, so the prompt sent to Gemini stays small
+RERANK_ENABLED = os.getenv("RAG_RERANK", "false").lower() in ("1", "true", "yes")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+# Torch intra-op threads; 0 keeps the library default
+RERANK_THREADS = int(os.getenv("RERANK_THREADS", "0"))
+RERANK_DEVICE = os.getenv("RERANK_DEVICE", "cpu")
+
+class Reranker:
+    """
+    Scores (question, chunk) pairs with a sentence-transformers CrossEncoder
+    in batches and reorders Chroma-shaped results by that score.
+    The model is loaded on first use.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    import torch
+
+                    if RERANK_THREADS > 0:
+                        torch.set_num_threads(RERANK_THREADS)
+                    self._model = CrossEncoder(self.model_name, device=RERANK_DEVICE)
+        return self._model
+
+    def rerank(self, question: str, results, k: int = 5):
+        documents = results["documents"][0]
+        if not documents:
+            return results
+
+        scores = self.model.predict(
+            [(question, document) for document in documents],
+            batch_size=RERANK_BATCH_SIZE,
+            show_progress_bar=False
+        )
+        order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)[:k]
+
+        return {
+            "ids": [[results["ids"][0][i] for i in order]],
+            "documents": [[documents[i] for i in order]],
+            "metadatas": [[results["metadatas"][0][i] for i in order]],
+            "distances": [[results["distances"][0][i] for i in order]],
+            "scores": [[float(scores[i]) for i in order]]
+        }
+
+_reranker = None
+
+def get_reranker() -> Reranker | None:
+    global _reranker
+    if not RERANK_ENABLED:
+        return None
+    if _reranker is None:
+        _reranker = Reranker()
+    return _reranker
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from src.utils.cache import CacheStats
+
+class SemanticCache:
+    """
+    Answer cache matched by question embedding instead of exact text.
+
+    Entries are partitioned by scope (user, document, k, retrieval mode,
+    corpus version) and each scope keeps a small normalised vector matrix,
+    so a lookup is one matrix-vector product over that tenant's questions.
+    A lookup hits when the best cosine similarity reaches the threshold.
+    Entries expire after ttl seconds and the least recently used entry is
+    evicted once max_entries is reached across all scopes.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, ttl: float | None = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()  # (scope, entry_id) -> (value, expires_at)
+        self._scopes = {}              # scope -> (entry ids, vector matrix)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, scope, vector):
+        query = self._normalize(vector)
+        now = time.monotonic()
+
+        with self._lock:
+            # Expired entries must not shadow a live match
+            self._purge_expired(scope, now)
+            index = self._scopes.get(scope)
+            if index is None or query.shape[0] != index[1].shape[1]:
+                self.stats.misses += 1
+                return None
+
+            ids, matrix = index
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.stats.misses += 1
+                return None
+
+            key = (scope, ids[best])
+            value, _ = self._entries[key]
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, scope, vector, value):
+        row = self._normalize(vector)[np.newaxis, :]
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+
+            index = self._scopes.get(scope)
+            if index is not None and index[1].shape[1] != row.shape[1]:
+                # Embedding model changed: vectors of the old size can't be compared
+                for old_id in index[0]:
+                    self._entries.pop((scope, old_id), None)
+                index = None
+
+            if index is None:
+                self._scopes[scope] = ([entry_id], row)
+            else:
+                ids, matrix = index
+                self._scopes[scope] = (ids + [entry_id], np.vstack([matrix, row]))
+
+            self._entries[(scope, entry_id)] = (value, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def _purge_expired(self, scope, now: float):
+        index = self._scopes.get(scope)
+        if index is None or not self.ttl:
+            return
+
+        ids, matrix = index
+        keep = [
+            self._entries[(scope, entry_id)][1] >= now
+            for entry_id in ids
+        ]
+        if all(keep):
+            return
+
+        for entry_id, live in zip(ids, keep):
+            if not live:
+                self._entries.pop((scope, entry_id), None)
+        if not any(keep):
+            del self._scopes[scope]
+        else:
+            self._scopes[scope] = (
+                [entry_id for entry_id, live in zip(ids, keep) if live],
+                matrix[np.array(keep)]
+            )
+
+    def _remove(self, key):
+        scope, entry_id = key
+        self._entries.pop(key, None)
+
+        ids, matrix = self._scopes[scope]
+        position = ids.index(entry_id)
+        if len(ids) == 1:
+            del self._scopes[scope]
+        else:
+            self._scopes[scope] = (
+                ids[:position] + ids[position + 1:],
+                np.delete(matrix, position, axis=0)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats.as_dict(),
+                "entries": len(self._entries),
+                "scopes": len(self._scopes),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold
+            }
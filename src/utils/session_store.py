@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.sql import func
+from src.agents.agent_state import AgentState
+from src.core.database import SessionLocal
+from src.models.agent_sessions import AgentSession
+from src.utils.cache import LRUCache
+from src.utils.context_builder import estimate_tokens
+from src.utils.models import models
+from src.utils.streaming import content_text
+
+logger = logging.getLogger("agent_sessions")
+logger.setLevel(logging.INFO)
+
+# "sql": sessions persist in the database, memory is a cache in front of it
+# "memory": sessions only live in the bounded in-process cache
+AGENT_SESSION_BACKEND = os.getenv("AGENT_SESSION_BACKEND", "sql")
+AGENT_SESSION_CACHE_MAX_BYTES = int(os.getenv("AGENT_SESSION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+AGENT_SESSION_TTL = float(os.getenv("AGENT_SESSION_TTL", "86400"))
+# Stored sessions idle longer than the TTL are deleted at most this often
+AGENT_SESSION_PURGE_INTERVAL = float(os.getenv("AGENT_SESSION_PURGE_INTERVAL", "3600"))
+
+# History above this budget is folded into a summary, keeping the latest messages verbatim
+AGENT_HISTORY_TOKEN_BUDGET = int(os.getenv("AGENT_HISTORY_TOKEN_BUDGET", "2000"))
+AGENT_KEEP_MESSAGES = int(os.getenv("AGENT_KEEP_MESSAGES", "4"))
+
+class SessionBackend(ABC):
+    """
+    Durable storage behind the in-memory session cache. Values are the
+    JSON-serialisable dicts produced by AgentState.to_dict, so any key-value
+    store (e.g. a Redis-compatible one) can implement this interface.
+    """
+
+    @abstractmethod
+    def load(self, user_id: int, conversation_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def save(self, user_id: int, conversation_id: str, data: dict):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id: int, conversation_id: str):
+        ...
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete sessions idle for longer than AGENT_SESSION_TTL."""
+
+def session_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=AGENT_SESSION_TTL)
+
+class SqlSessionBackend(SessionBackend):
+    def __init__(self):
+        self._next_purge = 0.0
+
+    def load(self, user_id: int, conversation_id: str) -> dict | None:
+        db = SessionLocal()
+        try:
+            row = db.get(AgentSession, (user_id, conversation_id))
+            if row is None:
+                return None
+
+            updated_at = row.updated_at
+            # SQLite hands back naive UTC timestamps
+            if updated_at is not None and updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            if updated_at is not None and updated_at < session_cutoff():
+                db.delete(row)
+                db.commit()
+                return None
+
+            return {
+                "active_document_id": row.active_document_id,
+                "chat_history": row.chat_history,
+                "summary": row.summary
+            }
+        finally:
+            db.close()
+
+    def save(self, user_id: int, conversation_id: str, data: dict):
+        db = SessionLocal()
+        try:
+            row = db.get(AgentSession, (user_id, conversation_id))
+            if row is None:
+                row = AgentSession(user_id=user_id, conversation_id=conversation_id)
+                db.add(row)
+            row.active_document_id = data["active_document_id"]
+            row.chat_history = data["chat_history"]
+            row.summary = data["summary"]
+            # Touch the row even when nothing changed, so activity keeps it alive
+            row.updated_at = func.now()
+            db.commit()
+        finally:
+            db.close()
+
+        if time.monotonic() >= self._next_purge:
+            self.purge_expired()
+
+    def delete(self, user_id: int, conversation_id: str):
+        db = SessionLocal()
+        try:
+            db.query(AgentSession).filter(
+                AgentSession.user_id == user_id,
+                AgentSession.conversation_id == conversation_id
+            ).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        self._next_purge = time.monotonic() + AGENT_SESSION_PURGE_INTERVAL
+        db = SessionLocal()
+        try:
+            deleted = db.query(AgentSession).filter(
+                AgentSession.updated_at < session_cutoff()
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if deleted:
+            logger.info(f"[SESSION] Purged {deleted} expired sessions")
+        return deleted
+
+class SessionStore:
+    """
+    Agent conversation state keyed by (user_id, conversation_id).
+    Reads are served from a byte-bounded LRU with TTL; writes go through
+    to the backend, so an evicted or expired session is reloaded on its
+    next request instead of being lost.
+    """
+
+    def __init__(self, backend: SessionBackend | None = None):
+        self.backend = backend
+        self.cache = LRUCache(max_bytes=AGENT_SESSION_CACHE_MAX_BYTES, ttl=AGENT_SESSION_TTL)
+
+    @staticmethod
+    def _key(user_id: int, conversation_id: str) -> str:
+        return f"{user_id}:{conversation_id}"
+
+    def load(self, user_id: int, conversation_id: str) -> AgentState:
+        key = self._key(user_id, conversation_id)
+        data = self.cache.get(key)
+        if data is None and self.backend is not None:
+            data = self.backend.load(user_id, conversation_id)
+            if data is not None:
+                self.cache.set(key, data)
+
+        if data is None:
+            return AgentState(user_id, conversation_id)
+        return AgentState.from_dict(user_id, conversation_id, data)
+
+    def save(self, state: AgentState):
+        data = state.to_dict()
+        self.cache.set(self._key(state.user_id, state.conversation_id), data)
+        if self.backend is not None:
+            self.backend.save(state.user_id, state.conversation_id, data)
+
+    def delete(self, user_id: int, conversation_id: str):
+        self.cache.delete(self._key(user_id, conversation_id))
+        if self.backend is not None:
+            self.backend.delete(user_id, conversation_id)
+
+    def purge_expired(self) -> int:
+        # The LRU expires its own entries; only stored sessions need purging
+        return self.backend.purge_expired() if self.backend is not None else 0
+
+    def info(self) -> dict:
+        return {"backend": AGENT_SESSION_BACKEND, "cache": self.cache.info()}
+
+def history_tokens(state: AgentState) -> int:
+    return estimate_tokens(state.summary or "") + sum(
+        estimate_tokens(message["content"]) for message in state.chat_history
+    )
+
+def split_history(state: AgentState) -> tuple[list[dict], list[dict]]:
+    # Everything but the latest messages, cut so the kept window starts on a user message
+    split = max(len(state.chat_history) - AGENT_KEEP_MESSAGES, 0)
+    while split < len(state.chat_history) and state.chat_history[split]["role"] != "user":
+        split += 1
+    return state.chat_history[:split], state.chat_history[split:]
+
+async def summarize_turns(summary: str | None, older: list[dict]) -> str | None:
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in older)
+    prompt = (
+        "Summarize this conversation between a user and a document assistant "
+        "in under 150 words. Keep facts, names, numbers and open questions.\n\n"
+        + (f"Existing summary: {summary}\n\n" if summary else "")
+        + transcript
+    )
+    try:
+        response = await models.llm.ainvoke(prompt)
+        return content_text(response.content).strip()
+    except Exception:
+        # Without a summary, fall back to the plain sliding window
+        logger.exception("[SESSION] Summarization failed")
+        return None
+
+async def compact_history(store: SessionStore, user_id: int, conversation_id: str):
+    """
+    Fold everything but the latest messages into the session summary once
+    the history exceeds AGENT_HISTORY_TOKEN_BUDGET. The summary is applied
+    to the stored state only if no other request changed those turns in
+    the meantime; otherwise the next turn retries.
+    """
+    state = await asyncio.to_thread(store.load, user_id, conversation_id)
+    if history_tokens(state) <= AGENT_HISTORY_TOKEN_BUDGET:
+        return
+
+    older, _ = split_history(state)
+    if not older:
+        return
+
+    summary = await summarize_turns(state.summary, older)
+
+    def apply():
+        current = store.load(user_id, conversation_id)
+        if current.summary != state.summary or current.chat_history[:len(older)] != older:
+            return
+        if summary is not None:
+            current.summary = summary
+        current.chat_history = current.chat_history[len(older):]
+        store.save(current)
+
+    await asyncio.to_thread(apply)
+
+# Conversations with a compaction in flight, and the tasks running them
+_compacting = set()
+_compaction_tasks = set()
+
+def schedule_compaction(store: SessionStore, state: AgentState):
+    """
+    Summarize in the background so replies never wait on the summary call.
+    At most one compaction runs per conversation at a time.
+    """
+    if history_tokens(state) <= AGENT_HISTORY_TOKEN_BUDGET:
+        return
+
+    key = (state.user_id, state.conversation_id)
+    if key in _compacting:
+        return
+    _compacting.add(key)
+
+    async def run():
+        try:
+            await compact_history(store, *key)
+        except Exception:
+            logger.exception(f"[SESSION {state.conversation_id}] Compaction failed")
+        finally:
+            _compacting.discard(key)
+
+    task = asyncio.create_task(run())
+    _compaction_tasks.add(task)
+    task.add_done_callback(_compaction_tasks.discard)
+
+def create_session_store() -> SessionStore:
+    if AGENT_SESSION_BACKEND == "memory":
+        return SessionStore()
+    return SessionStore(SqlSessionBackend())
+
+session_store = create_session_store()
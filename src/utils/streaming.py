@@ -0,0 +1,19 @@
+import json
+
+# Server-Sent-Events helpers shared by the streaming endpoints
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def content_text(content) -> str:
+    # Gemini message content can be a plain string or a list of content blocks
+    if isinstance(content, str):
+        return content
+
+    parts = []
+    for block in content or []:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type", "text") == "text":
+            parts.append(block.get("text", ""))
+    return "".join(parts)
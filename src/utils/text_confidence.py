@@ -0,0 +1,22 @@
+# Native-text quality heuristic used to decide which pages need OCR.
+# No imports, so PDF worker processes can load it cheaply.
+
+def analyze_text_confidence(text: str) -> float:
+    if not text:
+        return 0.0
+
+    words = text.split()
+    if not words:
+        return 0.0
+
+    avg_word_len = sum(len(w) for w in words) / len(words)
+
+    score = 0
+    if len(text) > 300:
+        score += 0.4
+    if avg_word_len > 3:
+        score += 0.4
+    if len(words) > 80:
+        score += 0.2
+
+    return round(score, 2)
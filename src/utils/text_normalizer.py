@@ -0,0 +1,85 @@
+import os
+import re
+import json
+import unicodedata
+from typing import Iterable, Iterator
+
+# Abbreviation normalization (medical-friendly)
+DEFAULT_ABBREVIATIONS = {
+    "ROM": "Range of Motion",
+    "ADL": "Activities of Daily Living",
+    "WNL": "Within Normal Limits",
+    "PT": "Physiotherapy",
+    "OT": "Occupational Therapy"
+}
+
+# Optional JSON file ({"ABBR": "Expansion", ...}) replacing the defaults
+ABBREVIATIONS_FILE = os.getenv("ABBREVIATIONS_FILE")
+
+# Precompiled patterns
+PAGE_MARKER = re.compile(r"Page\s*\d+\s*(of\s*\d+)?", re.IGNORECASE)
+MULTI_NEWLINE = re.compile(r"\n{2,}")
+MULTI_SPACE = re.compile(r"[ ]{2,}")
+BULLETS = re.compile(r"[•·●■□▪▶➤►]")
+
+class TextNormalizer:
+    """
+    Single-pass text normalizer. Abbreviations are expanded with one
+    combined alternation regex instead of one scan per abbreviation.
+    """
+
+    def __init__(self, abbreviations: dict[str, str] | None = None):
+        self.abbreviations = dict(DEFAULT_ABBREVIATIONS if abbreviations is None else abbreviations)
+
+        # Longest first so overlapping abbreviations prefer the longer match
+        keys = sorted(self.abbreviations, key=len, reverse=True)
+        self.abbreviation_pattern = (
+            re.compile(r"\b(?:" + "|".join(map(re.escape, keys)) + r")\b")
+            if keys else None
+        )
+
+    def _expand(self, match: re.Match) -> str:
+        return self.abbreviations[match.group(0)]
+
+    def normalize(self, text: str) -> str:
+        # Remove null bytes
+        text = text.replace("\x00", "")
+
+        # Normalize unicode characters (skipped when already NFKC)
+        if not unicodedata.is_normalized("NFKC", text):
+            text = unicodedata.normalize("NFKC", text)
+
+        # Remove common headers/footers
+        text = PAGE_MARKER.sub("", text)
+
+        # Replace special bullets safely
+        text = BULLETS.sub("-", text)
+
+        # Expand abbreviations in one scan
+        if self.abbreviation_pattern is not None:
+            text = self.abbreviation_pattern.sub(self._expand, text)
+
+        # Collapse multiple spaces/newlines
+        text = MULTI_NEWLINE.sub("\n\n", text)
+        text = MULTI_SPACE.sub(" ", text)
+
+        return text.strip()
+
+    def normalize_pages(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Streaming mode: normalize page by page so a large document is
+        never processed as one string. Empty pages are skipped; join the
+        results with a blank line to get the whole document.
+        """
+        for page in pages:
+            page = self.normalize(page)
+            if page:
+                yield page
+
+def load_abbreviations() -> dict[str, str] | None:
+    if not ABBREVIATIONS_FILE:
+        return None
+    with open(ABBREVIATIONS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+default_normalizer = TextNormalizer(load_abbreviations())
@@ -1,12 +1,166 @@
+import os
+import logging
+import threading
+from pathlib import Path
 import chromadb
+from src.utils.context_builder import chunk_position
+
+logger = logging.getLogger("vector_store")
+logger.setLevel(logging.INFO)
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_data")
+DEFAULT_COLLECTION = "physio_docs"
+
+# How chunks are partitioned between users:
+# "metadata" -> one shared collection, queries filtered by user_id
+# "tenant"   -> one collection per user, so k-NN only searches that user's chunks
+CHROMA_PARTITIONING = os.getenv("CHROMA_PARTITIONING", "metadata")
+
+# Process-wide client and collection handles.
+# Chroma's client is safe to share between threads; the lock only guards
+# creation so concurrent first requests don't open the store twice.
+_client = None
+_collections = {}
+_lock = threading.Lock()
 
 # Persistent local vector database
 def get_chroma_client():
-    return chromadb.PersistentClient(path="./chroma_data")
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return _client
+
+def init_chroma_client():
+    return get_chroma_client()
+
+def close_chroma_client():
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.clear_system_cache()
+        _client = None
+        _collections.clear()
 
 def get_or_create_collection(name="physio_docs"):
+    collection = _collections.get(name)
+    if collection is not None:
+        return collection
+
     client = get_chroma_client()
-    return client.get_or_create_collection(
-        name=name,
-        metadata={"hnsw:space": "cosine"}
-    )
+    with _lock:
+        collection = _collections.get(name)
+        if collection is None:
+            collection = client.get_or_create_collection(
+                name=name,
+                metadata={"hnsw:space": "cosine"}
+            )
+            _collections[name] = collection
+    return collection
+
+def get_user_collection(user_id: int):
+    if CHROMA_PARTITIONING == "tenant":
+        return get_or_create_collection(f"{DEFAULT_COLLECTION}_u{user_id}")
+    return get_or_create_collection(DEFAULT_COLLECTION)
+
+def scope_filter(user_id: int, document_id: int | None = None) -> dict | None:
+    conditions = []
+
+    # Tenant collections only hold one user's chunks already
+    if CHROMA_PARTITIONING != "tenant":
+        conditions.append({"user_id": user_id})
+
+    if document_id is not None:
+        conditions.append({"document_id": document_id})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+# Written once every shared chunk carries document_id metadata
+MIGRATION_MARKER = ".chunk_metadata_v1"
+MIGRATION_BATCH = 1000
+
+def with_document_id(chunk_id: str, metadata: dict | None) -> dict | None:
+    # Chunk ids are "<document_id>_<index>", so older chunks can be labelled from their id
+    metadata = dict(metadata or {})
+    if metadata.get("document_id") is None:
+        position = chunk_position(chunk_id)
+        if position is None or not position[0].isdigit():
+            return None
+        metadata["document_id"] = int(position[0])
+    return metadata
+
+def migrate_legacy_chunks():
+    """
+    One-off migration for chunks stored before retrieval was scoped:
+    adds the document_id metadata that document-scoped queries filter on,
+    and under tenant partitioning moves every chunk out of the shared
+    collection into its user's collection. Safe to re-run; finished work
+    is skipped.
+    """
+    marker = Path(CHROMA_PATH) / MIGRATION_MARKER
+    shared = get_or_create_collection(DEFAULT_COLLECTION)
+
+    if CHROMA_PARTITIONING == "tenant":
+        moved = 0
+        skipped = 0
+        while True:
+            # Moved chunks are deleted, so the next batch starts after the ones left behind
+            batch = shared.get(limit=MIGRATION_BATCH, offset=skipped, include=["documents", "metadatas", "embeddings"])
+            if not batch["ids"]:
+                break
+
+            by_user = {}
+            for chunk_id, document, metadata, embedding in zip(
+                batch["ids"], batch["documents"], batch["metadatas"], batch["embeddings"]
+            ):
+                metadata = with_document_id(chunk_id, metadata) or dict(metadata or {})
+                user_chunks = by_user.setdefault(metadata.get("user_id"), ([], [], [], []))
+                for column, value in zip(user_chunks, (chunk_id, document, metadata, embedding)):
+                    column.append(value)
+
+            for user_id, (ids, documents, metadatas, embeddings) in by_user.items():
+                if user_id is None:
+                    logger.warning(f"[MIGRATE] {len(ids)} chunks have no user_id and stay in {DEFAULT_COLLECTION}")
+                    skipped += len(ids)
+                    continue
+                get_user_collection(user_id).upsert(
+                    ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings
+                )
+                shared.delete(ids=ids)
+                moved += len(ids)
+
+        if moved:
+            logger.info(f"[MIGRATE] Moved {moved} chunks into per-user collections")
+
+    if marker.exists():
+        return
+
+    labelled = 0
+    offset = 0
+    while True:
+        batch = shared.get(limit=MIGRATION_BATCH, offset=offset, include=["metadatas"])
+        if not batch["ids"]:
+            break
+        offset += len(batch["ids"])
+
+        updates = [
+            (chunk_id, with_document_id(chunk_id, metadata))
+            for chunk_id, metadata in zip(batch["ids"], batch["metadatas"])
+            if (metadata or {}).get("document_id") is None
+        ]
+        updates = [(chunk_id, metadata) for chunk_id, metadata in updates if metadata is not None]
+        if updates:
+            shared.update(
+                ids=[chunk_id for chunk_id, _ in updates],
+                metadatas=[metadata for _, metadata in updates]
+            )
+            labelled += len(updates)
+
+    marker.touch()
+    if labelled:
+        logger.info(f"[MIGRATE] Added document_id to {labelled} chunks")